@@ -6,24 +6,148 @@
 #----------------------------------------------------------------------------------# 
 
 # Import all libraries.
+import hashlib
 import json
+import os
 import string
 import re
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize 
-import nltk
-from nltk.stem import WordNetLemmatizer
-from nltk.sentiment import SentimentIntensityAnalyzer
-from autocorrect import Speller
-
-# Download NLTK components.
-nltk.download([
-    'wordnet',
-    'stopwords',
-    'words',
-    'punkt',
-    'vader_lexicon'
-])
+from multiprocessing import Pool
+from tweetstore import TweetStore
+from matcher import KeywordMatcher
+from vader import BatchSentimentScorer, model_version
+from scorecache import ScoreCache
+from dedup import Deduplicator
+from langfilter import EnglishFilter
+from timeline import Timeline, text_day
+from records import file_lines, raw_records, file_position, resume_offset
+import resources
+from os import path
+import math
+
+# Punctuation removed from the tweets before they are analyzed.
+PUNCTUATION = str.maketrans("", "", string.punctuation)
+
+# Texts with a compound score of at least THRESHOLD are positive, and at most -THRESHOLD negative.
+THRESHOLD = 0.1
+
+# File keeping the counts of each ticker and how much of its tweets and articles files they include.
+STATE_PATH = "./sentiments/state.json"
+
+# Sentiment analysis model, keyword matcher and language filter of the current process. The keyword matcher
+# and language filter are set by the init_worker method, and the model is created by the scorer method.
+SCORER = None
+MATCHER = None
+LANGUAGE_FILTER = None
+
+# This method keeps the keyword matcher and language filter of the Analyzer in the current process. It runs once
+# in each worker process of the pool, so that they are not sent to the workers with every chunk of data.
+def init_worker(matcher=None, language_filter=None):
+    global MATCHER, LANGUAGE_FILTER
+    MATCHER = matcher
+    LANGUAGE_FILTER = language_filter
+
+# This method returns the sentiment analysis model of the current process, created the first time it is needed
+# (it is not needed at all when the scores come from the cache or the sentiment worker service).
+def scorer():
+    global SCORER
+    if SCORER is None:
+        SCORER = BatchSentimentScorer(resources.sentiment_analyzer())
+    return SCORER
+
+# This method cleans a tweet line (i.e.: "2021-05-10 @user Apple's earnings beat!"): it removes the mentions,
+# the punctuation, the date and repeated spaces, and lowers the case of the text (i.e.: "apples earnings beat").
+def clean_tweet(line):
+    text = re.sub(r'@[^\s]+',' ', line)
+    text = text.lower().translate(PUNCTUATION).strip()
+    words = text.split(" ")[1:]
+    return re.sub(r'\s{2,}', ' ', ' '.join(words))
+
+# This method adds the compound score of a text to the positive, negative or neutral count, weight times.
+def classify(analysis, r, weight=1):
+    if analysis >= THRESHOLD:
+        r["positive"] += weight
+    elif analysis < THRESHOLD and analysis > -THRESHOLD:
+        r["neutral"] += weight
+    else:
+        r["negative"] += weight
+
+# This method returns the sum of the given positive/negative/neutral counts.
+def merge_counts(counts):
+    r = {"positive": 0, "negative": 0, "neutral": 0}
+    for c in counts:
+        for k in r:
+            r[k] += c[k]
+    return r
+
+# This method splits a list in at most pieces chunks of consecutive items.
+def split(items, pieces):
+    size = max(1, math.ceil(len(items) / pieces))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+# This method cleans a chunk of tweet lines, given as a (lines, ticker, english_only) tuple, and returns the cleaned
+# tweets that mention one of the keywords of the ticker and their days (see the timeline.text_day method). If
+# english_only is True, the tweets that are not in English are dropped before matching. It also returns the number
+# of tweets dropped.
+def clean_tweets(chunk):
+    lines, ticker, english_only = chunk
+    texts = []
+    days = []
+    rejected = 0
+    for line in lines:
+        result = clean_tweet(line)
+        if english_only and not LANGUAGE_FILTER.is_english(result):
+            rejected += 1
+        elif MATCHER.mentions(result, ticker):
+            texts.append(result)
+            days.append(text_day(line))
+    return texts, days, rejected
+
+# This method returns the compound scores of a chunk of texts.
+def score_texts(texts):
+    return scorer().compound_scores(texts).tolist()
+
+# This method counts the positive, negative and neutral tweets of every ticker in a chunk of tweet lines, given
+# as a (lines, english_only) pair. Each tweet is scored once and counted for all the tickers it mentions, and the
+# tweets that are not in English are dropped if english_only is True. It returns {ticker: counts} for the tickers
+# mentioned in the chunk.
+def attribute_tweets(chunk):
+    lines, english_only = chunk
+    counts = {}
+    texts = []
+    mentions = []
+    for line in lines:
+        result = clean_tweet(line)
+        if english_only and not LANGUAGE_FILTER.is_english(result):
+            continue
+        tickers = MATCHER.tickers_in(result)
+        if tickers:
+            texts.append(result)
+            mentions.append(tickers)
+    for compound, tickers in zip(scorer().compound_scores(texts), mentions):
+        for ticker in tickers:
+            classify(compound, counts.setdefault(ticker, {"positive": 0, "negative": 0, "neutral": 0}))
+    return counts
+
+# This method returns the articles of the given database file. Each article is made of the lines up to
+# the next empty line (the date of the article included), and the lines after the last empty line are ignored.
+def article_records(db_path):
+    return [text for text, _ in raw_records(db_path)]
+
+# This method reads the lines of a file from the given offset, like a file opened in text mode does (the lines
+# end with a new line, whether the file uses "\n", "\r\n" or "\r"). It returns the lines, the offset after them,
+# and the text after the last new line (the last line of a tweets file may not end with a new line yet).
+def read_lines(file_path, offset):
+    lines = []
+    end = offset
+    rest = ""
+    with open(file_path, "rb") as f:
+        for line, line_end in file_lines(f, offset):
+            if line_end is None:
+                rest = line.decode("utf-8")
+            else:
+                lines.append(line.decode("utf-8") + "\n")
+                end = line_end
+    return lines, end, rest
 
 # This class is the Analyzer, which receives a list of tickers and analyzes the articles of the given 
 # tickers found in the database.
@@ -32,89 +156,281 @@ class Analyzer:
     # This is the constructor, which receives a dictionary of tickers as input (i.e.: {'GS':['goldman sachs', 'goldman', 'sachs', 'gs']}).
     def __init__(self, tickers):
         self.tickers = tickers
-        self.stop_words = set(stopwords.words('english'))
-        self.vocab = set(w.lower() for w in nltk.corpus.words.words())
+        self.matcher = KeywordMatcher(tickers)
+        self.language_filter = None
+        self.service = None
+        self.rejected = {}
+        self.timelines = {}
+
+    # This method returns the English stop words, loaded the first time they are needed.
+    @property
+    def stop_words(self):
+        return resources.stop_words()
+
+    # This method returns the English vocabulary, loaded the first time it is needed.
+    @property
+    def vocab(self):
+        return resources.english_vocab()
 
     # This method returns True if a given word contains the keywords from the tickers dictionary.
     def match(self, word, ticker):
-        for t in self.tickers[ticker]:
-            if t in word:
-                return True
-        return False
+        return self.matcher.mentions(word, ticker)
+
+    # This method returns the tickers whose keywords are contained in a given text.
+    def tickers_in(self, text):
+        return self.matcher.tickers_in(text)
+
+    # This method returns the tweets of a ticker as lines of text (i.e.: "2021-05-10 Apple earnings beat expectations"),
+    # read from the tweet store of the ticker if it exists, or from its tweets text file otherwise.
+    # If start and/or end are given (as "YYYY-MM-DD"), only the tweets from those dates (inclusive) are returned.
+    def tweet_lines(self, ticker, start=None, end=None):
+        if TweetStore.exists(ticker):
+            return TweetStore(ticker).lines(start, end)
+        f = open("./tweets//" + ticker + "-tweets.txt", "r", encoding="utf-8")
+        if start is None and end is None:
+            return f
+        return (l for l in f if (start is None or l[:10] >= start) and (end is None or l[:10] <= end))
+
+    # This method runs the given function (i.e.: score_texts) on the given chunks of data, in the pool of processes
+    # if there is one, and returns the results of all the chunks in a single list.
+    def run(self, function, chunks, pool):
+        results = pool.map(function, chunks) if pool is not None else map(function, chunks)
+        return [item for result in results for item in result]
+
+    # This method cleans the tweet lines of a ticker (split in at most pieces chunks) and returns the cleaned tweets
+    # that mention the ticker, their days, and the number of tweets dropped because they are not in English.
+    def clean(self, lines, ticker, pool, pieces, english_only):
+        chunks = [(chunk, ticker, english_only) for chunk in split(lines, pieces)]
+        results = list(pool.map(clean_tweets, chunks) if pool is not None else map(clean_tweets, chunks))
+        return ([text for texts, _, _ in results for text in texts], [day for _, days, _ in results for day in days],
+                sum(rejected for _, _, rejected in results))
+
+    # This method counts the positive, negative and neutral texts. Only the texts without a score in the cache
+    # are scored (split in at most pieces chunks, or by the sentiment worker service if the analysis uses one);
+    # the scores of the others are taken from the cache.
+    # If a deduplicator is given, only one text of each group of near duplicates is scored, and it is counted
+    # once for each text of its group if dedup is "weighted", or only once if dedup is "collapsed".
+    # If a timeline is given, the scores are also added to it, each on the day of its text (given in days).
+    def count(self, texts, cache, pool, pieces, dedup=None, deduplicator=None, days=None, timeline=None):
+        weights = [1] * len(texts)
+        members = None
+        if deduplicator is not None:
+            uncached = len(cache.missing(texts))
+            representatives, weights, members = deduplicator.collapse(texts)
+            texts = [texts[i] for i in representatives]
+            if dedup == "collapsed":
+                weights = [1] * len(texts)
+                members = None
+                days = [days[i] for i in representatives] if days is not None else None
+        missing = cache.missing(texts)
+        if deduplicator is not None:
+            deduplicator.scoring(uncached, len(missing))
+        if self.service is not None:
+            cache.add(missing, self.service.compound_scores(missing))
+        else:
+            cache.add(missing, self.run(score_texts, split(missing, pieces), pool))
+        scores = cache.get(texts)
+        r = {"positive": 0, "negative": 0, "neutral": 0}
+        for analysis, weight in zip(scores, weights):
+            classify(analysis, r, weight)
+
+        # Each near duplicate is added on its own day, with the score of the text kept for its group.
+        if timeline is not None:
+            timeline.add(days, scores if members is None else [scores[m] for m in members])
+        return r, len(missing)
+
+    # This method returns the tweet lines of a ticker added since the given position of the state, the position
+    # after them, whether the lines follow that position (False if the tweets are all read again), and the last
+    # line of the tweets file if it does not end with a new line yet (it is not included in the position).
+    def new_tweet_lines(self, ticker, position):
+        if TweetStore.exists(ticker):
+            store = TweetStore(ticker)
+            offset = resume_offset(store.data_path, position)
+            lines = list(store.lines(offset=offset))
+            return lines, file_position(store.data_path, store.size()), offset > 0, []
+        tweets_path = "./tweets//" + ticker + "-tweets.txt"
+        offset = resume_offset(tweets_path, position)
+        lines, end, rest = read_lines(tweets_path, offset)
+        return lines, file_position(tweets_path, end), offset > 0, [rest] if rest else []
+
+    # This method returns the articles of a ticker added since the given position of the state, the position after
+    # them, and whether the articles follow that position (False if the articles are all read again).
+    def new_article_records(self, ticker, position):
+        db_path = "./articles//" + ticker + "-db.txt"
+        offset = resume_offset(db_path, position)
+        records = []
+        end = offset
+        for text, end in raw_records(db_path, offset):
+            records.append(text)
+        return records, file_position(db_path, end), offset > 0
+
+    # This method returns the state of the last analysis, if it was made with the same model and threshold.
+    def load_state(self, version):
+        if path.exists(STATE_PATH):
+            with open(STATE_PATH, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("version") == version:
+                return state
+        return {"version": version}
+
+    # This method returns a hash of the keywords of the tickers, which decide the tweets counted for each ticker,
+    # so that the saved counts are not used anymore when a keyword is added or removed.
+    def keywords_version(self):
+        keywords = {ticker: sorted(words) for ticker, words in self.tickers.items()}
+        return hashlib.sha1(json.dumps(keywords, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+    # This method returns the timeline of a ticker for its "tweets" or "cnbc" texts, and keeps it in the timelines
+    # attribute: the saved timeline if it was filled up to the given position of the state, or a new one otherwise
+    # (in which case the texts have to be read from the start of the file).
+    def timeline(self, ticker, source, version=None, position=None):
+        timeline = Timeline.load(ticker, source, version, THRESHOLD) if position is not None else None
+        if timeline is None or timeline.position != position:
+            timeline = Timeline(version, THRESHOLD)
+        self.timelines[(ticker, source)] = timeline
+        return timeline
+
+    # This method updates the counts of a ticker in the state with the counts of its new tweets or articles.
+    def update_state(self, state, key, r, position, resumed):
+        if resumed and key in state:
+            r = merge_counts([state[key]["counts"], r])
+        state[key] = {"counts": r, "position": position}
+        return r
+
+    # This method creates the pool of processes used to score the data, or sets up the current process
+    # if processes is 1 (in which case it returns None).
+    # The language filter is only created (and the English words loaded) if english_only is True.
+    def open_pool(self, processes, english_only=True):
+        if english_only and self.language_filter is None:
+            self.language_filter = EnglishFilter(self.stop_words, self.vocab)
+        if processes > 1:
+            return Pool(processes, initializer=init_worker, initargs=(self.matcher, self.language_filter))
+        init_worker(self.matcher, self.language_filter)
+        return None
+
+    # This method analyzes a single stream of tweet lines shared by all the tickers (i.e.: a file with the
+    # tweets of a market search), going through it once. Each tweet is counted for every ticker it mentions.
+    # It returns {ticker: counts} with the counts of all the tickers (zero for the tickers never mentioned).
+    def attribute_tweets(self, lines, processes=1, english_only=True):
+        pool = self.open_pool(processes, english_only)
+        try:
+            chunks = [(chunk, english_only) for chunk in split(list(lines), processes * 4)]
+            results = pool.map(attribute_tweets, chunks) if pool is not None else map(attribute_tweets, chunks)
+            results = list(results)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        return {ticker: merge_counts(r[ticker] for r in results if ticker in r) for ticker in self.tickers}
 
     # This method analyzes the CNBC articles and the tweets from the companies passed as parameter.
-    def analyze_cnbc_and_twitter(self):
-
-        # Iterate over the companies names.
-        for ticker in self.tickers.keys():
-            print("Starting tweets analysis for", ticker)
-            f = open("./tweets//" + ticker + "-tweets.txt", "r", encoding="utf-8")
-            r = {
-                "positive": 0,
-                "negative": 0,
-                "neutral": 0
-                }
- 
-            sia = SentimentIntensityAnalyzer() # Create sentiment analysis model.
-            text = ""
-            counter = 0
-            # Make the analysis for each tweet.
-            for line in f: 
-                counter += 1
-                if counter % 1000 == 0:
-                    print("Additional 1000 tweets analyzed!")
-                text = re.sub(r'@[^\s]+',' ', line)
-                text = text.lower().translate(str.maketrans("","", string.punctuation)).strip()
-                words = text.split(" ")[1:]
-                result = re.sub(r'\s{2,}', ' ', ' '.join(words))
-                if self.match(result, ticker):
-                    analysis = sia.polarity_scores(result)['compound']
-                    if analysis >= 0.1:
-                        r["positive"] += 1
-                    elif analysis < 0.1 and analysis > -0.1:
-                        r["neutral"] += 1
-                    else:
-                        r["negative"] += 1
-                text = ""
-            print()
-            # Output the results to a .txt file.
-            data = {ticker: r}
-            with open("./sentiments/" + ticker + '-sentiments-tweets.txt', 'w+') as outfile:
-                json.dump(data, outfile)
-
-
-        # Iterate over the companies names.
-        for ticker in self.tickers.keys():
-            
-            # Do not attempt to analyze bitcoin news.
-            if "BTC" not in ticker:
-                print("Starting news analysis for", ticker)
-                r = {
-                    "positive": 0,
-                    "negative": 0,
-                    "neutral": 0
-                    }
-                f = open("./articles//" + ticker +"-db.txt", "r", encoding="utf-8")
-                lines = f.readlines()
-                text = ""
-
-                # Analyze articles' sentiments.
-                for line in lines:
-                    if line != "\n":
-                        text += line
-                    else:
-                        analysis = sia.polarity_scores(text)['compound']
-                        if analysis >= 0.1:
-                            r["positive"] += 1
-                        elif analysis < 0.1 and analysis > -0.1:
-                            r["neutral"] += 1
-                        else:
-                            r["negative"] += 1
-                        text = ""
-                print()
-                
-                # Output results to .txt file.
+    # The tweets analyzed can be limited to a range of dates with start and end (see the tweet_lines method).
+    # If processes is greater than 1, the tweets and articles of each company are split in chunks that are
+    # scored in a pool of that many processes; the counts are the same as when scoring in a single process.
+    # The scores are kept in a cache, so each text is only scored once. When all the dates are analyzed, the
+    # counts are kept in the state too, and the next analysis only reads the tweets and articles added since.
+    # If dedup is "weighted" or "collapsed", near duplicate tweets are only scored once (see the count method).
+    # The counts of "collapsed" depend on all the tweets at once (a new tweet may be a near duplicate of one counted
+    # before), so they are not kept in the state, and all the tweets and articles are analyzed every time.
+    # If english_only is True, the tweets that are not in English are dropped, and the number of tweets dropped
+    # for each ticker is kept in the rejected attribute.
+    # The counts of each day are kept in the timelines attribute (see timeline.py), and saved with the state when all
+    # the dates are analyzed, so the sentiments can be charted over time (the tweet lines without a date are left out).
+    # If service is the socket path of a running sentiment worker service (see sentimentd.py), the texts are scored
+    # by the service, and the sentiment model is not loaded by this process at all.
+    def analyze_cnbc_and_twitter(self, start=None, end=None, processes=1, dedup=None, english_only=True, service=None):
+        if dedup not in (None, "weighted", "collapsed"):
+            raise ValueError("dedup must be None, 'weighted' or 'collapsed'")
+        if service is not None:
+            from sentimentd import SentimentClient
+            self.service = SentimentClient(service)
+            version = self.service.version()
+        else:
+            version = model_version(resources.sentiment_analyzer())
+        cache = ScoreCache(version)
+        deduplicator = Deduplicator() if dedup else None
+        incremental = start is None and end is None and dedup != "collapsed"
+        state = self.load_state("-".join([version, str(THRESHOLD), str(dedup), str(english_only), self.keywords_version()])) if incremental else {}
+        self.timelines = {}
+        pool = self.open_pool(processes, english_only)
+        pieces = processes * 4
+
+        try:
+            # Iterate over the companies names.
+            for ticker in self.tickers.keys():
+                print("Starting tweets analysis for", ticker)
+
+                # Make the analysis for each new tweet.
+                key = ticker + "-tweets"
+                rest = []
+                if incremental:
+                    timeline = self.timeline(ticker, "tweets", state["version"], state.get(key, {}).get("position"))
+                    lines, position, resumed, rest = self.new_tweet_lines(ticker, timeline.position)
+                    if not resumed:
+                        timeline = self.timeline(ticker, "tweets", state["version"])
+                else:
+                    timeline = self.timeline(ticker, "tweets")
+                    lines = list(self.tweet_lines(ticker, start, end))
+                texts, days, rejected = self.clean(lines, ticker, pool, pieces, english_only)
+                r, scored = self.count(texts, cache, pool, pieces, dedup, deduplicator, days, timeline)
+                if incremental:
+                    r = self.update_state(state, key, r, position, resumed)
+                    timeline.position = position
+                    timeline.save(ticker, "tweets")
+
+                # A last line that is still being written is counted, but it is read again next time.
+                if rest:
+                    texts, days, rest_rejected = self.clean(rest, ticker, pool, 1, english_only)
+                    r = merge_counts([r, self.count(texts, cache, pool, 1, dedup, deduplicator, days, timeline)[0]])
+                    rejected += rest_rejected
+                self.rejected[ticker] = rejected
+                print(len(lines) + len(rest), "tweets analyzed!", rejected, "not in English,", scored, "tweets scored.")
+
+                # Output the results to a .txt file.
                 data = {ticker: r}
-                with open("./sentiments//" + ticker + '-sentiments-cnbc.txt', 'w+') as outfile:
+                with open("./sentiments/" + ticker + '-sentiments-tweets.txt', 'w+') as outfile:
                     json.dump(data, outfile)
-                print("Done with news analysis for", ticker)
+
+            # Iterate over the companies names.
+            for ticker in self.tickers.keys():
+
+                # Do not attempt to analyze bitcoin news.
+                if "BTC" not in ticker:
+                    print("Starting news analysis for", ticker)
+
+                    # Analyze new articles' sentiments.
+                    key = ticker + "-cnbc"
+                    if incremental:
+                        timeline = self.timeline(ticker, "cnbc", state["version"], state.get(key, {}).get("position"))
+                        records, position, resumed = self.new_article_records(ticker, timeline.position)
+                        if not resumed:
+                            timeline = self.timeline(ticker, "cnbc", state["version"])
+                    else:
+                        timeline = self.timeline(ticker, "cnbc")
+                        records = article_records("./articles//" + ticker + "-db.txt")
+                    days = [text_day(record) for record in records]
+                    r, scored = self.count(records, cache, pool, pieces, days=days, timeline=timeline)
+                    if incremental:
+                        r = self.update_state(state, key, r, position, resumed)
+                        timeline.position = position
+                        timeline.save(ticker, "cnbc")
+
+                    # Output results to .txt file.
+                    data = {ticker: r}
+                    with open("./sentiments//" + ticker + '-sentiments-cnbc.txt', 'w+') as outfile:
+                        json.dump(data, outfile)
+                    print("Done with news analysis for", ticker)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+            if self.service is not None:
+                self.service.close()
+                self.service = None
+            cache.save()
+            if deduplicator is not None:
+                deduplicator.report()
+            # The state is written next to the old one and then moved over it, so that it is never left half written.
+            if incremental:
+                with open(STATE_PATH + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump(state, f)
+                os.replace(STATE_PATH + ".tmp", STATE_PATH)
@@ -0,0 +1,155 @@
+#----------------------------------------------------------------------------------#
+#  This file contains benchmarks for the parts of the pipeline that process a lot
+#  of data. Each benchmark is run from the command line, i.e.:
+#
+#      python benchmark.py extractor ./fixtures
+#      python benchmark.py vader ./tweets
+#      python benchmark.py records ./articles 1,10,50
+#
+#  Authors: Allen Westgate, Bernardo Santos, and Ryan Farrell.
+#----------------------------------------------------------------------------------#
+
+# Import all libraries.
+import glob
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# This method measures how fast each article extractor backend processes the HTML pages saved in the given
+# folder (by default, the CNBC article pages in ./fixtures), and prints the pages per second, the peak memory used by
+# Python objects while extracting, and how many pages gave a different text than the full html.parser parse
+# used originally.
+def bench_extractor(folder="./fixtures"):
+    from extractor import ArticleExtractor, BACKENDS
+
+    pages = []
+    for name in sorted(glob.glob(folder + "/*.html")):
+        with open(name, "r", encoding="utf-8", errors="replace") as f:
+            pages.append(f.read())
+    if not pages:
+        print("No pages found in", folder)
+        return
+
+    reference = [ArticleExtractor("html.parser", restricted=False).extract(p) for p in pages]
+    print("{:<12} {:<10} {:>10} {:>12} {:>10}".format("backend", "restricted", "pages/s", "peak MB", "mismatch"))
+    for backend in BACKENDS:
+        for restricted in [False, True]:
+            extractor = ArticleExtractor(backend, restricted)
+            tracemalloc.start()
+            start = time.perf_counter()
+            results = [extractor.extract(p) for p in pages]
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            mismatch = sum(1 for r, ref in zip(results, reference) if r != ref)
+            print("{:<12} {:<10} {:>10.1f} {:>12.2f} {:>10}".format(
+                backend, str(restricted), len(pages) / elapsed, peak / 2**20, mismatch))
+
+# This method measures how many texts per second the BatchSentimentScorer and NLTK's SentimentIntensityAnalyzer
+# score, with the lines of the tweets text files in the given folder, and prints how many compound scores differ
+# by more than the given tolerance between the two.
+def bench_vader(folder="./tweets", tolerance=1e-4):
+    from resources import sentiment_analyzer
+    from vader import BatchSentimentScorer
+
+    texts = []
+    for name in sorted(glob.glob(folder + "/*.txt")):
+        with open(name, "r", encoding="utf-8") as f:
+            texts.extend(line.rstrip("\n") for line in f)
+    if not texts:
+        print("No tweets found in", folder)
+        return
+
+    sia = sentiment_analyzer()
+    scorer = BatchSentimentScorer(sia)
+    start = time.perf_counter()
+    reference = [sia.polarity_scores(t)["compound"] for t in texts]
+    nltk_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    scores = scorer.compound_scores(texts)
+    batch_elapsed = time.perf_counter() - start
+
+    mismatch = sum(1 for s, ref in zip(scores, reference) if abs(s - ref) > float(tolerance))
+    print("{:<8} {:>10} {:>10} {:>10}".format("scorer", "texts", "texts/s", "mismatch"))
+    print("{:<8} {:>10} {:>10.1f} {:>10}".format("nltk", len(texts), len(texts) / nltk_elapsed, "-"))
+    print("{:<8} {:>10} {:>10.1f} {:>10}".format("batch", len(texts), len(texts) / batch_elapsed, mismatch))
+    print("Speedup:", round(nltk_elapsed / batch_elapsed, 2))
+
+# This method reads the articles of a database file like the Analyzer and the Cluster classes did before the
+# records module: all the lines at once, each article built by adding its lines one at a time. It returns the
+# number of articles and of characters read.
+def read_records_at_once(db_path):
+    with open(db_path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+    count, size, text = 0, 0, ""
+    for line in lines:
+        if line != "\n":
+            text += line
+        else:
+            count, size, text = count + 1, size + len(text), ""
+    return count, size
+
+# This method reads the articles of a database file with the records module, buffered or memory mapped, and
+# returns the number of articles and of characters read.
+def read_records_streaming(db_path, memory_map=False):
+    from records import raw_records
+
+    count, size = 0, 0
+    for text, _ in raw_records(db_path, memory_map=memory_map):
+        count, size = count + 1, size + len(text)
+    return count, size
+
+# This method measures how fast the articles database files in the given folder are read, and the peak memory
+# used by Python objects while reading, by the old reader and by the records module. The files are copied the
+# given number of times (comma separated, i.e.: "1,10,50") into a temporary database, to show how the memory
+# used grows with the size of the database.
+def bench_records(folder="./articles", scales="1,10,50"):
+    files = sorted(glob.glob(folder + "/*-db.txt"))
+    if not files:
+        print("No articles found in", folder)
+        return
+    data = b""
+    for name in files:
+        with open(name, "rb") as f:
+            data += f.read()
+            if not data.endswith(b"\n\n") and not data.endswith(b"\r\n\r\n"):
+                data += b"\r\n\r\n"
+
+    readers = [
+        ("at once", read_records_at_once),
+        ("buffered", read_records_streaming),
+        ("mmap", lambda db_path: read_records_streaming(db_path, memory_map=True))
+    ]
+    print("{:<10} {:>10} {:>10} {:>12} {:>10}".format("reader", "file MB", "articles", "articles/s", "peak MB"))
+    for scale in [int(x) for x in str(scales).split(",")]:
+        handle, db_path = tempfile.mkstemp(suffix="-db.txt")
+        try:
+            with os.fdopen(handle, "wb") as f:
+                for _ in range(scale):
+                    f.write(data)
+            for name, reader in readers:
+                tracemalloc.start()
+                start = time.perf_counter()
+                count, _ = reader(db_path)
+                elapsed = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print("{:<10} {:>10.1f} {:>10} {:>12.1f} {:>10.2f}".format(
+                    name, len(data) * scale / 2**20, count, count / elapsed, peak / 2**20))
+        finally:
+            os.remove(db_path)
+
+# Benchmarks that can be run from the command line.
+BENCHMARKS = {
+    "extractor": bench_extractor,
+    "vader": bench_vader,
+    "records": bench_records
+}
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print("Usage: python benchmark.py <" + "|".join(BENCHMARKS) + "> [arguments]")
+        sys.exit(1)
+    BENCHMARKS[sys.argv[1]](*sys.argv[2:])
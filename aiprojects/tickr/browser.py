@@ -0,0 +1,237 @@
+#----------------------------------------------------------------------------------#
+# This file contains the helpers shared by the Scraper and Cluster classes to load
+# the CNBC search page with Selenium, waiting only as long as the page needs
+# instead of sleeping for a fixed amount of time, and to time each phase of a run.
+# It also contains the BrowserPool class, which keeps headless browser sessions
+# alive so that they can be reused across tickers and by both classes.
+#
+# Authors: Allen Westgate, Bernardo Santos, and Ryan Farrell.
+#----------------------------------------------------------------------------------#
+
+# Import all libraries.
+from contextlib import contextmanager
+from msedge.selenium_tools import EdgeOptions, Edge
+from selenium.common.exceptions import InvalidSessionIdException, TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from webdriver_manager.microsoft import EdgeChromiumDriverManager
+import queue
+import threading
+import time
+
+# Path to the Edge driver executable, looked up only once per process.
+DRIVER_PATH = None
+
+# Script run in the browser to collect the links of the search results in a single call.
+# It receives the substrings that exclude a link as its only argument.
+EXTRACT_LINKS_SCRIPT = '''
+var exclude = arguments[0];
+var links = [];
+var nodes = document.querySelectorAll("#searchcontainer .resultlink");
+for (var i = 0; i < nodes.length; i++) {
+    if (nodes[i].getAttribute("class") !== "resultlink" || !nodes[i].href) continue;
+    var href = nodes[i].href;
+    var skip = false;
+    for (var j = 0; j < exclude.length; j++) {
+        if (href.indexOf(exclude[j]) !== -1) { skip = true; break; }
+    }
+    if (!skip) links.push({"href": href, "title": nodes[i].textContent.trim()});
+}
+return links;
+'''
+
+# This method builds the URL of the CNBC search page for the given company name.
+def search_url(company):
+    return "https://www.cnbc.com/search/?query=" + str(company) + "&qsearchterm=" + str(company)
+
+# This method opens the given URL and waits until the search results container and at least one
+# result link are present, for at most timeout seconds. It returns the container element.
+def open_search_page(driver, url, timeout=15):
+    driver.get(url)
+    return wait_for_results(driver, timeout)
+
+# This method waits until the search results container of the current page and at least one result
+# link are present, for at most timeout seconds. It returns the container element.
+def wait_for_results(driver, timeout=15):
+    wait = WebDriverWait(driver, timeout)
+    container = wait.until(EC.presence_of_element_located((By.ID, "searchcontainer")))
+    try:
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "#searchcontainer .resultlink")))
+    except TimeoutException:
+        print("No results found in", driver.current_url)
+    return container
+
+# This method scrolls to the bottom of the page at most max_scrolls times, so that more results are loaded.
+# After each scroll it waits (for at most timeout seconds) for the page to grow; if it does not, the end
+# of the results has been reached. It returns the number of scrolls performed.
+def scroll_to_end(driver, max_scrolls=20, timeout=5):
+    height = driver.execute_script("return document.body.scrollHeight")
+    count = 0
+    while count < max_scrolls:
+        count += 1
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=0.2).until(
+                lambda d: d.execute_script("return document.body.scrollHeight") > height)
+        except TimeoutException:
+            break
+        height = driver.execute_script("return document.body.scrollHeight")
+    return count
+
+# This method returns the search results of the current page, as a list of dictionaries with the "href" and
+# "title" of each result, in page order. Results whose link contains any of the substrings in exclude are skipped.
+# All the links are collected by a single script run in the browser, instead of one call per element.
+def extract_result_links(driver, exclude=()):
+    return driver.execute_script(EXTRACT_LINKS_SCRIPT, list(exclude))
+
+# This method opens each of the given URLs in a new tab of the browser without waiting for them to load,
+# so that the pages load in parallel. It returns the window handles of the tabs, in the same order as the URLs.
+def open_tabs(driver, urls):
+    handles = []
+    for url in urls:
+        before = set(driver.window_handles)
+        driver.execute_script("window.open(arguments[0], '_blank');", url)
+        handles.append([h for h in driver.window_handles if h not in before][0])
+    return handles
+
+# This method closes the given tabs and goes back to the first tab of the browser.
+def close_tabs(driver, handles):
+    for handle in handles:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(driver.window_handles[0])
+
+# This is the BrowserPool class, which keeps up to size browser sessions open so that they can be checked
+# out by the Scraper and Cluster classes and reused across tickers, instead of starting a new browser every time.
+# The sessions are only started when they are first needed.
+class BrowserPool:
+
+    # Constructor method of the BrowserPool class.
+    # Input: the maximum number of browser sessions, and whether the browsers should run without a window.
+    def __init__(self, size=1, headless=True):
+        self.size = size
+        self.headless = headless
+        self.drivers = []
+        self.slots = 0
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+
+    # This method starts a new browser session.
+    def new_driver(self):
+        global DRIVER_PATH
+
+        '''
+        # If using Firefox as your webdriver, please use the following (with from selenium import webdriver):
+
+        firefox_options = webdriver.FirefoxOptions()
+        firefox_options.headless = self.headless
+        return webdriver.Firefox(executable_path='geckodriver.exe', options=firefox_options)
+
+        # And please comment the lines below.
+        '''
+
+        if DRIVER_PATH is None:
+            DRIVER_PATH = EdgeChromiumDriverManager().install()
+        options = EdgeOptions()
+        options.use_chromium = True
+        if self.headless:
+            options.add_argument("headless")
+            options.add_argument("disable-gpu")
+        return Edge(executable_path=DRIVER_PATH, options=options)
+
+    # This method checks out a browser session, i.e.: with pool.session() as driver: ...
+    # If all the sessions are in use and the pool is full, it waits until one of them is returned.
+    # A session whose block raised an exception because the browser is gone (i.e.: it crashed or lost its
+    # connection) is closed instead of being returned, and its place is taken by a new session the next time one
+    # is needed. After any other exception (i.e.: a page that took too long to load), the session is returned.
+    # The idle queue holds the returned sessions and None for each free place in the pool.
+    @contextmanager
+    def session(self):
+        try:
+            driver = self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                reserved = self.slots < self.size
+                if reserved:
+                    self.slots += 1
+            driver = None if reserved else self.idle.get()
+
+        # Browsers are started outside the lock, so that several sessions can start at the same time.
+        if driver is None:
+            try:
+                driver = self.new_driver()
+            except Exception:
+                self.idle.put(None)
+                raise
+            with self.lock:
+                self.drivers.append(driver)
+
+        try:
+            yield driver
+        except BaseException as e:
+            if self.dead(driver, e):
+                self.discard(driver)
+            else:
+                self.idle.put(driver)
+            raise
+        self.idle.put(driver)
+
+    # This method returns True if the given exception, raised while using a browser session, means that the
+    # session can no longer be used. Errors other than timeouts are checked by asking the browser for its page.
+    def dead(self, driver, error):
+        if isinstance(error, InvalidSessionIdException):
+            return True
+        if not isinstance(error, WebDriverException) or isinstance(error, TimeoutException):
+            return False
+        try:
+            driver.current_url
+            return False
+        except Exception:
+            return True
+
+    # This method closes a browser session that can no longer be used and frees its place in the pool.
+    def discard(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        with self.lock:
+            if driver not in self.drivers:
+                return
+            self.drivers.remove(driver)
+        self.idle.put(None)
+
+    # This method closes all the browser sessions.
+    def close(self):
+        with self.lock:
+            for driver in self.drivers:
+                driver.quit()
+            self.drivers.clear()
+            self.slots = 0
+            self.idle = queue.Queue()
+
+# This is the PhaseTimer class, which measures how long each phase of a run takes and prints a report.
+# It receives the name of the run as input (i.e.: "Scraping AAPL").
+class PhaseTimer:
+
+    # Constructor method of the PhaseTimer class.
+    def __init__(self, name):
+        self.name = name
+        self.phases = []
+
+    # This method times the block of code run inside it, i.e.: with timer.phase("load"): ...
+    @contextmanager
+    def phase(self, label):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((label, time.perf_counter() - start))
+
+    # This method prints the time taken by each phase and the total time.
+    def report(self):
+        print(self.name, "timing:")
+        for label, seconds in self.phases:
+            print("  {:<12} {:8.2f}s".format(label, seconds))
+        print("  {:<12} {:8.2f}s".format("total", sum(s for _, s in self.phases)))
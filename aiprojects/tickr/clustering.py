@@ -8,21 +8,54 @@
 
 # Import all libraries.
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
-import requests
-from bs4 import BeautifulSoup
-import yfinance as yf
-import datetime
+import numpy as np
 from scraper import Scraper
-from datetime import timedelta
+from browser import BrowserPool, open_search_page, search_url, extract_result_links, PhaseTimer
+from extractor import ArticleExtractor
+from fetcher import Fetcher
+from httpcache import HTTPCache
+from records import raw_records, split_record
+from clustermodel import ClusterModel, implied_change, init_fit_worker, update_model
+from kselection import saved_k
+from pricestore import price_history
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool
 from os import path
-from msedge.selenium_tools import EdgeOptions, Edge
-from selenium import webdriver
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
-import time
 import json
 import sys
+import time
+
+# Substrings of the links that should not be used as the most recent news article
+# (videos, special sections, and articles that are not about the company's stock).
+LINK_BLACKLIST = [
+    "/video/",
+    "/amazon-rising/",
+    "id",
+    "/select/",
+    "jpmorgan-ceo-jamie-dimon-shares-success-advice-to-college-graduates",
+    "china-stock-picks-goldman-sachs-likes"
+]
+
+# This method returns the price change of a stock for each of the given article dates (as "YYYY/MM/DD"), given
+# its price history (as returned by price_history): the close price on the trading day after the article minus the open
+# price on the first trading day on or after the article date, so that the articles published on weekends and
+# holidays are matched with the next trading day. The articles are matched with the history in a single as-of
+# join, and the articles published after the last day of the history have a change of 0.
+def price_changes(dates, hist):
+    if len(dates) == 0 or len(hist) == 0:
+        return np.zeros(len(dates))
+    articles = pd.DataFrame({
+        "date": pd.to_datetime(pd.Series(dates, dtype=object), format="%Y/%m/%d").astype("datetime64[ns]"),
+        "order": np.arange(len(dates))
+    })
+    days = hist.index.tz_localize(None) if hist.index.tz is not None else hist.index
+    prices = pd.DataFrame({
+        "date": days.normalize().astype("datetime64[ns]"),
+        "open": hist["Open"].to_numpy(),
+        "close": hist["Close"].shift(-1).fillna(hist["Close"]).to_numpy()
+    })
+    joined = pd.merge_asof(articles.sort_values("date"), prices, on="date", direction="forward").sort_values("order")
+    return (joined["close"] - joined["open"]).fillna(0).to_numpy()
 
 # This is the Cluster class, which contains attributes such as companies names, ticker names, 
 # and a ticker dictionary containing both the ticker and the name of the company to be used
@@ -30,185 +63,158 @@ import sys
 class Cluster:
 
     # This is the constructor class, which receives the companies names, tickers
-    # names and ticker dictionary as input.
-    def __init__(self, company_names, ticker_names, ticker_dict):
+    # names and ticker dictionary as input. It can also receive a BrowserPool shared with
+    # other classes; if none is given, a headless browser is started for this class.
+    # Articles are downloaded through the given HTTPCache, or the default one in ./cache.
+    # The clustering model of each company is kept between runs and only updated with the new articles,
+    # unless refit is True (see the ClusterModel class).
+    def __init__(self, company_names, ticker_names, ticker_dict, pool=None, cache=None, refit=False):
         self.company_names = company_names
         self.ticker_names = ticker_names
         self.ticker_dict = ticker_dict
-        self.date = []
-        self.news_list = []
-        self.title = []
-        self.news_dict = {}
+        self.own_pool = pool is None
+        self.pool = BrowserPool() if pool is None else pool
+        self.extractor = ArticleExtractor()
+        self.cache = HTTPCache() if cache is None else cache
+        self.fetcher = Fetcher(workers=max(1, len(company_names)), cache=self.cache)
+        self.refit = refit
+
+    # This method scrapes the articles database of the given company if it does not exist yet.
+    def Database(self, ticker):
+        if path.exists("./articles//" + ticker + "-db.txt")==False:
+            inv_dict = {v: k for k, v in self.ticker_dict.iteritems()}
+            scraper = Scraper(inv_dict, pool=self.pool, cache=self.cache)
+            scraper.Scrape()
+
+    # This method gets the most recent news article of the given company and the price history of its ticker,
+    # and returns its headline, its body (None if it could not be extracted) and the history.
+    def Download(self, company, ticker, timer):
+        # Scrape the CNBC page to get the most recent news article, using a browser session from the pool.
+        with self.pool.session() as driver:
+            # Open the search page, waiting until the results are loaded.
+            with timer.phase("load"):
+                open_search_page(driver, search_url(company))
+
+            # Get the first result that is not blacklisted.
+            with timer.phase("extract"):
+                news = extract_result_links(driver, exclude=LINK_BLACKLIST)
+                link = news[0]["href"] if news else ''
+                print(link)
+
+        # Get the article page and extract its headline and body.
+        with timer.phase("fetch"):
+            page = self.fetcher.get(link)
+            self.cache.save()
+        newTitle, article = self.extractor.extract(page)
+
+        if article is None:
+            print(newTitle)
+        with timer.phase("history"):
+            hist = price_history(ticker, "2017-01-01")
+        return newTitle, article, hist
+
+    # This method clusters the most recent news article of the given company with the updated clustering model,
+    # outputs the result to a text file and returns the price change prediction.
+    def Predictions(self, company, ticker, model, article, hist, timer):
+        # The last article, if it is not followed by an empty line yet, is placed in a cluster, but it is only
+        # added to the model once it is complete.
+        with timer.phase("rest"):
+            rest = [split_record(text) for text, _ in raw_records(model.position["path"], model.position["offset"], partial=True)]
+            rest = [(date, body) for date, body in rest if date is not None]
+            dates = model.dates + [date for date, _ in rest]
+            labels = np.concatenate([model.labels, model.predict([body for _, body in rest])]) if rest else model.labels
+
+        # Get the price change of each article.
+        with timer.phase("join"):
+            change_list = price_changes(dates, hist)
+
+            # Save the table of the mean price change of each cluster with the model, for the predictions.
+            model.set_changes(labels, change_list)
+            model.save(ticker)
+
+        # Get the cluster of the most recent news article and the mean price change of that cluster.
+        if article is not None:
+            cluster, change_prediction = model.predict_changes([article])
+            cluster, change_prediction = int(cluster[0]), float(change_prediction[0])
+
+        # Write the clustering data (the cluster and the price change of each article, x and y respectively)
+        # to the <companyname>clusteringdata.txt file. The most recent news article comes first, with no change yet.
+        points = np.column_stack([labels, np.trunc(change_list).astype(np.int64)])
+        if article is not None:
+            points = np.concatenate([[[cluster, 0]], points])
+        np.savetxt("./clustering/clusteringdata" + self.ticker_dict[company] + ".txt", points, fmt="%d", delimiter=",")
+        timer.report()
+
+        # Return the change in price prediction to the caller.
+        return change_prediction if article is not None else 0
 
     # This method performs the clustering (K-means) and outputs the result to a text file.
-    # Input: 
+    # Input: the name of the company (as used in the CNBC search) and its ticker.
     def Clustering(self, company, ticker):
-        # Clear all lists/dictionaries.
-        self.date.clear()
-        self.news_list.clear()
-        self.news_dict.clear()
-        self.title.clear()
+        timer = PhaseTimer("Clustering " + ticker)
 
         # Check if database and content files already exist. If so, then just keep going and
         # get the most recent news, which is going to be used in the clustering model.
-        if path.exists("./articles//" + ticker + "-db.txt")==False:
-            inv_dict = {v: k for k, v in self.ticker_dict.iteritems()}
-            scraper = Scraper(inv_dict)
-            scraper.Scrape()
+        self.Database(ticker)
+        newTitle, article, hist = self.Download(company, ticker, timer)
 
-        '''
-        # If using Firefox as your webdriver, please use the following:
-
-        firefox_options = webdriver.FirefoxOptions()
-        firefox_options.headless = True
-        driver = webdriver.Firefox(executable_path='geckodriver.exe', options=firefox_options)
-
-        # And please comment lines 70-72.
-        '''
-
-        # Scrape the CNBC page to get the most recent news article.
-        driver = webdriver.Edge(EdgeChromiumDriverManager().install())
-        options = EdgeOptions()
-        options.use_chromium = True
-        
-        url = "https://www.cnbc.com/search/?query=" + str(company) + "&qsearchterm=" + str(company)
-        driver.get(url)
-        time.sleep(5)
-
-        container = driver.find_element_by_id("searchcontainer")
-        time.sleep(5)
-
-        news = container.find_elements_by_css_selector("*")
-        time.sleep(5)
-
-        link = ''
-        loop_count = 0
-
-        while link == '' and loop_count < 1000:
-            loop_count += 1 
-            for n in news:
-                if n.get_attribute("class") == "resultlink":
-                    if "/video/" not in n.get_attribute("href") and \
-                        ("/amazon-rising/" not in n.get_attribute("href")) \
-                            and ("id" not in n.get_attribute("href")) and ("/select/" not in n.get_attribute("href")) and \
-                                ("jpmorgan-ceo-jamie-dimon-shares-success-advice-to-college-graduates" not in n.get_attribute("href")) and\
-                                    ("china-stock-picks-goldman-sachs-likes" not in n.get_attribute("href")):
-                        link=n.get_attribute("href")
-                        print(link)
-                        break
-
-        driver.close() # Close the driver.
-
-        # Get the article page and parse it using BeautifulSoup.
-        page = requests.get(link)
-        soup = BeautifulSoup(page.text, 'html.parser')
-        article = soup.find_all("div", {"class": "ArticleBody-articleBody"})
-        newTitle=soup.find("h1", {"class": "ArticleHeader-headline"})
-        newTitle=str(newTitle).replace("<h1 class=\"ArticleHeader-headline\">","")
-        self.date.append(soup.find("", {"class": ""}))
-
-        try:
-            self.news_dict[newTitle]=article[0].get_text()
-        except:
-            print(newTitle)
-        stock_ticker=yf.Ticker(ticker)
-        startDate=datetime.datetime.strptime("2017/01/01","%Y/%m/%d")
-        hist = stock_ticker.history(start=startDate)
-        change_list= [0]
-
-        # Read the content file for the given company.
-        counter=0
-        r=open("./articles//" + ticker + "-db.txt","r",encoding="utf-8")
-        lines = r.readlines()
-
-        # Iterate over all articles bodies.
-        for l in lines:
-
-            # Check if line is not empty.
-            if l != "\n":
-                parts=l.split(",",1)
-                if counter==100:
-                    break
-                openPrice=0
-                closePrice=0
-
-                # Find date of the article.
-                dateObj=datetime.datetime.strptime(parts[0].rstrip(),"%Y/%m/%d")
-
-                # Find the next day of the article date.
-                nextDay=dateObj+timedelta(days=2)
-
-                # Check if the date is in our historical dataset (check if article was not published on a weekend, or holiday).
-                if str(dateObj).removesuffix(" 00:00:00") in hist.index:
-
-                    # Get the open price on the day the article was created.
-                    openPrice=hist.loc[str(dateObj).removesuffix(" 00:00:00"),"Open"]
-
-                    # Get the close price on the day after the article was created.
-                    closePrice = hist.loc[str(dateObj).removesuffix(" 00:00:00"), "Close"]
-
-                    # Check if the next day is in our stock values historical data.
-                    if str(nextDay).removesuffix(" 00:00:00") in hist.index:
-                        closePrice=hist.loc[str(nextDay).removesuffix(" 00:00:00"),"Close"]
-
-                # Add the change for each article to a list.
-                change_list.append(closePrice-openPrice)
-                self.news_dict[counter] = parts[1] 
-                counter+=1
-
-            try:
-                if parts[0] not in self.news_dict.keys():
-                    self.news_dict[parts[0]] = parts[2]
-            except:
-                pass
-
-            counter+=1
-
-        for link in self.news_dict:
-            self.news_list.append(self.news_dict[link])
-            self.title.append(link)
-
-        # Initialize the TfidVectorizer model.
-        vectorizer = TfidfVectorizer(stop_words={'english'})
-        X = vectorizer.fit_transform(self.news_list) # Fit the news list to the model.
-
-        true_k = 10 # Define the k value.
-
-        # Create and fit the K-means model.
-        model = KMeans(n_clusters=true_k, init='k-means++', max_iter=200, n_init=10)
-        model.fit(X)
-        labels=model.labels_
-        news_cl=pd.DataFrame(list(zip(self.title,labels)),columns=['title','cluster'])
-        news_cl['change']=change_list
-
-        clusterholder=[]
-        changeholder=[]
-
-        # Append cluster info (data points) to lists clusterholder and changeholder (x and y, respectively).
-        for index, row in news_cl.iterrows():
-            clusterholder.append(int(row['cluster']))
-            changeholder.append(int(row['change']))
-        
-        # Write the clustering data to the <companyname>clusteringdata.txt file.
-        f = open("./clustering/clusteringdata" + self.ticker_dict[company] + ".txt", "w+")
-        for i, j in zip(clusterholder, changeholder):
-            f.write(str(i) + "," + str(j) + "\n") 
-        f.close()
+        # Update the clustering model with the new articles of the content file for the given company.
+        with timer.phase("fit"):
+            model = ClusterModel.update(ticker, saved_k(ticker), self.refit)
+        return self.Predictions(company, ticker, model, article, hist, timer)
 
-        # Return the change in price prediction to the caller.
-        try:
-            cluster=news_cl.loc[news_cl['title'] == newTitle].iloc[0]['cluster']
-            change_prediction=news_cl.groupby(['cluster']).mean().iloc[cluster]['change']
-            return change_prediction
-        except:
-            return 0
+    # This method returns the price change implied for a ticker by a headline (or article), using the saved clustering
+    # model of the ticker without fitting anything (see the clustermodel.implied_change method), or 0 if the ticker
+    # has not been clustered yet or the headline has no word known by the model.
+    def Predict(self, ticker, text):
+        result = implied_change(ticker, text)
+        return result[1] if result is not None else 0
 
     # This is the driver of the class, which performs clustering for each of the companies passed as parameter
-    # in the constructor.
-    def Driver(self):
+    # in the constructor, and prints the wall time taken by each company and by the whole run.
+    # If processes is greater than 1, the companies are clustered at the same time: the clustering models are
+    # updated in a pool of that many processes, each using at most threads threads for its numerical libraries,
+    # while the most recent news articles and the price histories are downloaded in threads. The results and the
+    # files written are the same as when the companies are clustered one after the other. The time of each company
+    # is then the time of its own phases (see PhaseTimer), without the time spent waiting for the other companies.
+    def Driver(self, processes=1, threads=1):
         result = {}
-        for i in range(len(self.company_names)):
-            ticker = self.ticker_dict[str(self.company_names[i])]
-            result[ticker] = str(self.Clustering(self.company_names[i],self.ticker_names[i]))
-            with open("./clustering/" + ticker + '-clustering.txt', 'w+') as outfile:
-                json.dump(result[ticker], outfile)
+        wall = {}
+        tickers = [self.ticker_dict[str(company)] for company in self.company_names]
+        run_start = time.perf_counter()
+        if processes > 1:
+            for ticker in self.ticker_names:
+                self.Database(ticker)
+
+            # Start the fits before the threads, so that the processes of the pool are not copied from a
+            # process with threads running.
+            fit_pool = Pool(min(processes, len(self.ticker_names)), initializer=init_fit_worker, initargs=(threads,))
+            fits = [fit_pool.apply_async(update_model, (ticker, saved_k(ticker), self.refit)) for ticker in self.ticker_names]
+            fit_pool.close()
+            timers = [PhaseTimer("Clustering " + ticker) for ticker in self.ticker_names]
+            with ThreadPoolExecutor(max_workers=len(self.ticker_names)) as executor:
+                downloads = [executor.submit(self.Download, company, ticker, timer)
+                             for company, ticker, timer in zip(self.company_names, self.ticker_names, timers)]
+                for i in range(len(self.company_names)):
+                    newTitle, article, hist = downloads[i].result()
+                    model, seconds = fits[i].get()
+                    timers[i].phases.append(("fit", seconds))
+                    result[tickers[i]] = str(self.Predictions(self.company_names[i], self.ticker_names[i], model, article, hist, timers[i]))
+                    with open("./clustering/" + tickers[i] + '-clustering.txt', 'w+') as outfile:
+                        json.dump(result[tickers[i]], outfile)
+                    wall[tickers[i]] = sum(seconds for _, seconds in timers[i].phases)
+            fit_pool.join()
+        else:
+            for i in range(len(self.company_names)):
+                start = time.perf_counter()
+                result[tickers[i]] = str(self.Clustering(self.company_names[i],self.ticker_names[i]))
+                with open("./clustering/" + tickers[i] + '-clustering.txt', 'w+') as outfile:
+                    json.dump(result[tickers[i]], outfile)
+                wall[tickers[i]] = time.perf_counter() - start
+        if self.own_pool:
+            self.pool.close()
+
+        print("Clustering wall time:")
+        for ticker in tickers:
+            print("  {:<12} {:8.2f}s".format(ticker, wall[ticker]))
+        print("  {:<12} {:8.2f}s".format("total", time.perf_counter() - run_start))
@@ -0,0 +1,246 @@
+#----------------------------------------------------------------------------------#
+# This file contains the ClusterModel class, which clusters the news articles of a
+# company with TF-IDF vectors and K-means. The model (vocabulary, document counts,
+# centroids and the cluster of each article) is kept in a file, and on each run the
+# new articles of the database are added to it in a single mini-batch, so the work
+# grows with the new articles instead of the whole history. The model is fitted
+# again from all the articles on demand, or when the new articles drift away from
+# the ones it was fitted with. The price change implied by a headline is answered
+# from the saved model without fitting anything, i.e.:
+#
+#      python clustermodel.py AAPL "Apple beats earnings expectations"
+#
+# Authors: Allen Westgate, Bernardo Santos, and Ryan Farrell.
+#----------------------------------------------------------------------------------#
+
+# Import all libraries.
+from os import path
+import os
+import pickle
+import sys
+import time
+import numpy as np
+from scipy import sparse
+from threadpoolctl import threadpool_limits
+from sklearn.cluster import KMeans
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.preprocessing import normalize
+from records import raw_records, split_record, file_position, resume_offset
+
+# Models already loaded by the current process, with the modification time of their files.
+LOADED = {}
+
+# Limits of the threads of the numerical libraries (BLAS and OpenMP) in the processes that fit the models.
+LIMITS = None
+
+# This is the ClusterModel class. It receives the number of clusters as input, and when the model has to be
+# fitted again: when more than drift of the words of the new articles are not in the vocabulary, when their mean
+# squared distance to their centroids is more than drift above the one of the fitted articles, or when there are
+# more than growth times as many new articles as fitted ones.
+class ClusterModel:
+
+    # Constructor method of the ClusterModel class.
+    def __init__(self, k=10, drift=0.25, growth=1.0):
+        self.k = k
+        self.drift = drift
+        self.growth = growth
+        self.vectorizer = None
+        self.document_counts = None
+        self.documents = 0
+        self.centers = None
+        self.sizes = None
+        self.dates = []
+        self.labels = np.zeros(0, dtype=np.int64)
+        self.changes = None
+        self.position = None
+        self.fitted = 0
+        self.baseline = 0.0
+        self.words = 0
+        self.unknown = 0
+        self.distance = 0.0
+        self.added = 0
+
+    # This method returns the path of the model of a ticker.
+    @staticmethod
+    def file_path(ticker):
+        return "./clustering/" + ticker + "-model.pkl"
+
+    # This method returns the saved model of a ticker, or None if there is none.
+    @staticmethod
+    def load(ticker):
+        if not path.exists(ClusterModel.file_path(ticker)):
+            return None
+        with open(ClusterModel.file_path(ticker), "rb") as f:
+            return pickle.load(f)
+
+    # This method saves the model of a ticker.
+    def save(self, ticker):
+        with open(ClusterModel.file_path(ticker), "wb") as f:
+            pickle.dump(self, f)
+
+    # This method returns the articles of a database file from the given offset that have a date, as lists of
+    # dates and bodies, and the offset after the last complete article.
+    @staticmethod
+    def read(db_path, offset=0):
+        dates, texts = [], []
+        end = offset
+        for text, end in raw_records(db_path, offset):
+            date, body = split_record(text)
+            if date is not None:
+                dates.append(date)
+                texts.append(body)
+        return dates, texts, end
+
+    # This method returns the model of a ticker with all the articles of its database: the saved model with the
+    # new articles added, or a model fitted from all the articles if refit is True, if there is no saved model,
+    # if the database was rewritten, or if the new articles drifted. The model is saved before it is returned.
+    @staticmethod
+    def update(ticker, k=10, refit=False):
+        db_path = "./articles//" + ticker + "-db.txt"
+        model = None if refit else ClusterModel.load(ticker)
+        offset = resume_offset(db_path, model.position) if model is not None and model.k == k else 0
+        dates, texts, end = ClusterModel.read(db_path, offset)
+
+        if offset > 0 and texts:
+            model.partial_fit(texts, dates)
+            if model.drifted():
+                print("The articles of", ticker, "drifted, fitting the clustering model again")
+                offset = 0
+                dates, texts, end = ClusterModel.read(db_path)
+        if offset == 0:
+            model = ClusterModel(k)
+            model.fit(texts, dates)
+        model.position = file_position(db_path, end)
+        model.save(ticker)
+        return model
+
+    # This method returns the inverse document frequency of each word of the vocabulary (with the same smoothing
+    # as the TfidfVectorizer of scikit-learn).
+    def idf(self):
+        return np.log((1 + self.documents) / (1 + self.document_counts)) + 1
+
+    # This method returns the TF-IDF vectors (normalized to length 1) of the given word counts.
+    def tfidf(self, counts):
+        return normalize(counts @ sparse.diags(self.idf()))
+
+    # This method returns the cluster of each of the given TF-IDF vectors and its squared distance to the centroid.
+    def assign(self, X):
+        distances = (self.centers ** 2).sum(axis=1) - 2 * (X @ self.centers.T) + 1
+        labels = distances.argmin(axis=1)
+        return labels, distances[np.arange(len(labels)), labels]
+
+    # This method fits the model from all the given articles (the texts and their dates): the vocabulary and the
+    # document counts of its words, and the centroids of K-means (with 10 initializations, as Cluster did).
+    def fit(self, texts, dates):
+        self.vectorizer = CountVectorizer(stop_words="english")
+        counts = self.vectorizer.fit_transform(texts)
+        self.document_counts = np.bincount(counts.indices, minlength=counts.shape[1]).astype(np.float64)
+        self.documents = len(texts)
+        X = self.tfidf(counts)
+
+        model = KMeans(n_clusters=min(self.k, len(texts)), init='k-means++', max_iter=200, n_init=10)
+        model.fit(X)
+        self.centers = model.cluster_centers_
+        self.labels = model.labels_.astype(np.int64)
+        self.sizes = np.bincount(self.labels, minlength=len(self.centers)).astype(np.float64)
+        self.dates = list(dates)
+        self.fitted = len(texts)
+        self.baseline = model.inertia_ / len(texts)
+        self.words, self.unknown, self.distance, self.added = 0, 0, 0.0, 0
+
+    # This method adds new articles to the model: the document counts of the words of the vocabulary (the new words
+    # are only added when the model is fitted again), and the centroids, each moved to the mean of its articles
+    # as in mini-batch K-means.
+    def partial_fit(self, texts, dates):
+        analyzer = self.vectorizer.build_analyzer()
+        counts = self.vectorizer.transform(texts)
+        words = sum(len(analyzer(text)) for text in texts)
+        self.words += words
+        self.unknown += words - int(counts.sum())
+        self.document_counts += np.bincount(counts.indices, minlength=counts.shape[1])
+        self.documents += len(texts)
+
+        X = self.tfidf(counts)
+        labels, distances = self.assign(X)
+        members = sparse.csr_matrix((np.ones(len(labels)), (labels, np.arange(len(labels)))), shape=(len(self.centers), len(labels)))
+        batch_sizes = np.bincount(labels, minlength=len(self.centers))
+        self.sizes += batch_sizes
+        self.centers += (np.asarray((members @ X).todense()) - batch_sizes[:, None] * self.centers) / np.maximum(self.sizes, 1)[:, None]
+
+        self.labels = np.concatenate([self.labels, labels])
+        self.dates.extend(dates)
+        self.distance += float(distances.sum())
+        self.added += len(texts)
+
+    # This method returns True if the articles added since the model was fitted drifted away from the fitted ones.
+    def drifted(self):
+        if self.added == 0:
+            return False
+        return (self.added > self.growth * self.fitted or self.unknown > self.drift * max(self.words, 1)
+                or self.distance / self.added > (1 + self.drift) * self.baseline)
+
+    # This method returns the cluster of each of the given texts (i.e.: the most recent news article).
+    def predict(self, texts):
+        return self.assign(self.tfidf(self.vectorizer.transform(texts)))[0]
+
+    # This method computes the table of the mean price change of the articles of each cluster (0 for the clusters
+    # without articles), given the cluster and the price change of each article.
+    def set_changes(self, labels, changes):
+        counts = np.bincount(labels, minlength=len(self.centers))
+        sums = np.bincount(labels, weights=changes, minlength=len(self.centers))
+        self.changes = np.where(counts > 0, sums / np.maximum(counts, 1), 0.0)
+
+    # This method returns the cluster of each of the given texts and the mean price change of its cluster, or None
+    # for the changes if the table of changes was not computed yet (see the Cluster.Clustering method).
+    def predict_changes(self, texts):
+        labels = self.predict(texts)
+        return labels, (self.changes[labels] if self.changes is not None else None)
+
+# This method sets up a process that fits the models of several companies at the same time (see the
+# Cluster.Driver method): the numerical libraries of each process use at most the given number of threads, so
+# that the processes do not compete for the cores.
+def init_fit_worker(threads=1):
+    global LIMITS
+    LIMITS = threadpool_limits(limits=threads)
+
+# This method updates the model of a ticker (see the ClusterModel.update method) in a process of the pool, and
+# returns the model and the time it took (in seconds).
+def update_model(ticker, k=10, refit=False):
+    start = time.perf_counter()
+    model = ClusterModel.update(ticker, k, refit)
+    return model, time.perf_counter() - start
+
+# This method returns the saved model of a ticker, loaded once per process (and again if its file changed).
+def saved_model(ticker):
+    file_path = ClusterModel.file_path(ticker)
+    if not path.exists(file_path):
+        return None
+    modified = os.stat(file_path).st_mtime_ns
+    if ticker not in LOADED or LOADED[ticker][0] != modified:
+        LOADED[ticker] = (modified, ClusterModel.load(ticker))
+    return LOADED[ticker][1]
+
+# This method returns what a headline (or article) implies for a ticker, from its saved model and without fitting
+# anything: the cluster of the headline and the mean price change of the articles in that cluster. It returns None
+# if the ticker has no saved model with a table of changes yet, or if the headline has no word of the vocabulary of
+# the model (i.e.: it is empty or only has stop words), since it would not be any closer to one cluster than another.
+def implied_change(ticker, text):
+    model = saved_model(ticker)
+    if model is None or getattr(model, "changes", None) is None:
+        return None
+    if model.vectorizer.transform([text]).sum() == 0:
+        return None
+    labels, changes = model.predict_changes([text])
+    return int(labels[0]), float(changes[0])
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python clustermodel.py <TICKER> <headline>")
+        sys.exit(1)
+    start = time.perf_counter()
+    result = implied_change(sys.argv[1], " ".join(sys.argv[2:]))
+    elapsed = time.perf_counter() - start
+    if result is None:
+        print("No clustering model with price changes for", sys.argv[1] + " (run the clustering first), or no known words in the headline.")
+    else:
+        print("Cluster", result[0], "mean price change", round(result[1], 4), "(" + str(round(elapsed * 1000, 1)), "ms)")
@@ -0,0 +1,140 @@
+#----------------------------------------------------------------------------------#
+# This file contains the TweetCollector class, which retrieves the tweets of several
+# tickers at the same time. All the tickers share the request budget of the Twitter
+# search API (a token bucket per app credential), and requests are spread across
+# several credentials when more than one is given.
+#
+# Authors: Allen Westgate, Bernardo Santos, and Ryan Farrell.
+#----------------------------------------------------------------------------------#
+
+# Import all libraries.
+from concurrent.futures import ThreadPoolExecutor
+from collections import namedtuple
+from twitter import collect_tweets
+import datetime
+import threading
+import time
+import requests
+
+# Standard search endpoint of the Twitter API, and its rate limit for app authentication
+# (450 requests every 15 minutes).
+SEARCH_URL = "https://api.twitter.com/1.1/search/tweets.json"
+REQUESTS_PER_WINDOW = 450
+WINDOW = 15 * 60
+
+# A tweet as returned by the search, with the same attributes used from tweepy's results.
+Tweet = namedtuple("Tweet", ["id", "created_at", "full_text"])
+
+# This is the TokenBucket class, which models the rate limit of one credential: it holds up to capacity
+# requests and refills at capacity requests per period seconds.
+class TokenBucket:
+
+    # Constructor method of the TokenBucket class.
+    def __init__(self, capacity=REQUESTS_PER_WINDOW, period=WINDOW):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0
+        self.lock = threading.Lock()
+
+    # This method takes one request from the bucket. It returns 0 if the request can be sent now,
+    # or the time (in seconds) until a request will be available otherwise.
+    def take(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    # This method corrects the bucket with the rate limit headers sent by the server: the number of
+    # requests left in the window, and the time (in seconds since the epoch) at which the window resets.
+    def sync(self, remaining, reset):
+        with self.lock:
+            self.tokens = min(self.tokens, remaining)
+            if remaining <= 0:
+                self.blocked_until = time.monotonic() + max(0, reset - time.time())
+
+# This is the TweetCollector class. It receives the bearer tokens of the app credentials to use as input.
+# The endpoint can be changed to a local server that behaves like the search API (i.e.: for testing), and
+# workers is the number of tickers collected at the same time.
+class TweetCollector:
+
+    # Constructor method of the TweetCollector class.
+    def __init__(self, bearer_tokens, endpoint=SEARCH_URL, workers=4, capacity=REQUESTS_PER_WINDOW, period=WINDOW, retries=5):
+        self.credentials = [(token, TokenBucket(capacity, period)) for token in bearer_tokens]
+        self.endpoint = endpoint
+        self.workers = workers
+        self.retries = retries
+        self.next = 0
+        self.lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    # This method waits until one of the credentials has a request available and returns it.
+    # The credentials are tried in turns, so that the requests are spread across all of them.
+    def acquire(self):
+        while True:
+            with self.lock:
+                start = self.next
+                self.next = (self.next + 1) % len(self.credentials)
+            waits = []
+            for i in range(len(self.credentials)):
+                token, bucket = self.credentials[(start + i) % len(self.credentials)]
+                wait = bucket.take()
+                if wait == 0:
+                    return token, bucket
+                waits.append(wait)
+            time.sleep(min(waits))
+
+    # This method sends one search request and returns the tweets found, newest first.
+    def search(self, query, sinceId, max_id):
+        params = {"q": query, "count": 100, "lang": "en", "tweet_mode": "extended"}
+        if sinceId:
+            params["since_id"] = sinceId
+        if max_id > 0:
+            params["max_id"] = str(max_id - 1)
+
+        while True:
+            token, bucket = self.acquire()
+            page = self.session.get(self.endpoint, params=params, headers={"Authorization": "Bearer " + token}, timeout=30)
+            if "x-rate-limit-remaining" in page.headers:
+                bucket.sync(int(page.headers["x-rate-limit-remaining"]), int(page.headers.get("x-rate-limit-reset", 0)))
+
+            # If this credential ran out of requests, send the request again with the next available one.
+            if page.status_code == 429:
+                bucket.sync(0, int(page.headers.get("x-rate-limit-reset", time.time() + WINDOW)))
+                continue
+            page.raise_for_status()
+
+            return [Tweet(t["id"], datetime.datetime.strptime(t["created_at"], "%a %b %d %H:%M:%S %z %Y"), t["full_text"])
+                    for t in page.json()["statuses"]]
+
+    # This method retrieves the tweets of a single ticker and returns the number of tweets retrieved
+    # and the time (in seconds) it took.
+    def collect(self, ticker, query, count):
+        start = time.perf_counter()
+        retrieved = collect_tweets(ticker, count, lambda sinceId, max_id: self.search(query, sinceId, max_id), self.retries)
+        return retrieved, time.perf_counter() - start
+
+    # This method retrieves the tweets of all the given tickers (i.e.: {"JPM": "jpmorgan"}) at the same time,
+    # writing them to the same files as the TwitterAPI.Connect method. It prints and returns the number of
+    # tweets retrieved per minute for each ticker.
+    def Connect(self, tickers, count=12000):
+        def collect(ticker):
+            query = "('$" + ticker + " OR " + tickers[ticker] + "') -filter:retweets"
+            return ticker, self.collect(ticker, query, count)
+
+        throughput = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for ticker, (retrieved, seconds) in executor.map(collect, tickers.keys()):
+                throughput[ticker] = retrieved / seconds * 60 if seconds > 0 else 0
+                print(ticker, ":", retrieved, "tweets in", round(seconds, 1), "s (", round(throughput[ticker], 1), "tweets/min )")
+        return throughput
@@ -0,0 +1,134 @@
+#----------------------------------------------------------------------------------#
+# This file contains the Deduplicator class, which groups texts that are the same or
+# almost the same (i.e.: copy-pasted tweets with a different link or price), so that
+# only one text of each group has to be scored. Exact duplicates are found with a
+# hash of the text, and near duplicates with MinHash signatures and LSH buckets.
+#
+# Authors: Allen Westgate, Bernardo Santos, and Ryan Farrell.
+#----------------------------------------------------------------------------------#
+
+# Import all libraries.
+import zlib
+import numpy as np
+
+# Number of shingles whose hashes are computed at the same time (it bounds the memory used by the signatures).
+BLOCK = 65536
+
+# This is the Deduplicator class. Two texts are near duplicates if the Jaccard similarity of their sets of
+# shingles (sequences of ngram consecutive words) is at least threshold. The similarity is estimated with
+# num_perm MinHash values per text, split in bands to find the pairs of texts to compare.
+class Deduplicator:
+
+    # Constructor method of the Deduplicator class.
+    def __init__(self, threshold=0.8, num_perm=64, bands=16, ngram=3, seed=1):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram = ngram
+
+        # Each MinHash value uses its own multiply-shift hash function: ((a * x + b) mod 2^64) >> 32, a odd.
+        random = np.random.RandomState(seed)
+        self.a = (random.randint(0, 2**32, num_perm, dtype=np.uint64) << np.uint64(32)) | random.randint(0, 2**32, num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = (random.randint(0, 2**32, num_perm, dtype=np.uint64) << np.uint64(32)) | random.randint(0, 2**32, num_perm, dtype=np.uint64)
+        self.stats = {"texts": 0, "exact": 0, "near": 0, "groups": 0, "uncached": 0, "scored": 0}
+
+    # This method returns the hashes of the shingles of a text. A text with fewer words than a shingle
+    # is a single shingle.
+    def shingles(self, text):
+        words = text.split()
+        if len(words) <= self.ngram:
+            return [zlib.crc32(" ".join(words).encode("utf-8"))]
+        return list(set(zlib.crc32(" ".join(words[i:i + self.ngram]).encode("utf-8")) for i in range(len(words) - self.ngram + 1)))
+
+    # This method returns the MinHash signatures of the given texts, as a (texts, num_perm) array.
+    def signatures(self, texts):
+        signatures = np.zeros((len(texts), self.num_perm), np.uint64)
+        start = 0
+        while start < len(texts):
+            # Take texts until the block of shingles is full (and at least one text).
+            hashes = []
+            offsets = []
+            end = start
+            while end < len(texts) and (end == start or len(hashes) < BLOCK):
+                offsets.append(len(hashes))
+                hashes.extend(self.shingles(texts[end]))
+                end += 1
+            x = np.array(hashes, np.uint64)
+            with np.errstate(over="ignore"):
+                values = (self.a[:, None] * x[None, :] + self.b[:, None]) >> np.uint64(32)
+            signatures[start:end] = np.minimum.reduceat(values, offsets, axis=1).T
+            start = end
+        return signatures
+
+    # This method returns the group of each text, as the index of the first text of its group. Texts of the same
+    # group are equal, or near duplicates of the first text of a group they are joined to.
+    def groups(self, texts):
+        # Exact duplicates: only the first of the equal texts is kept for the near duplicates search.
+        first = {}
+        group = np.array([first.setdefault(text, i) for i, text in enumerate(texts)], np.int64)
+        unique = np.array(sorted(first.values()), np.int64)
+        parent = {}
+
+        # Near duplicates: the texts that fall in the same bucket for a band are compared with the first text
+        # of the bucket, and joined to its group if their estimated similarity is at least the threshold.
+        if len(unique) > 1:
+            signatures = self.signatures([texts[i] for i in unique])
+            for band in range(self.bands):
+                rows = np.ascontiguousarray(signatures[:, band * self.rows:(band + 1) * self.rows])
+                _, leaders, buckets = np.unique(rows.view(np.dtype((np.void, rows.dtype.itemsize * self.rows))).ravel(),
+                                                return_index=True, return_inverse=True)
+                leader = leaders[buckets.ravel()]
+                candidates = np.flatnonzero(leader != np.arange(len(unique)))
+                if len(candidates) == 0:
+                    continue
+                similar = candidates[(signatures[candidates] == signatures[leader[candidates]]).mean(1) >= self.threshold]
+                for i, j in zip(unique[similar].tolist(), unique[leader[similar]].tolist()):
+                    self.join(parent, i, j)
+
+        # The group of a text is the first text of its group of near duplicates.
+        roots = np.array([self.find(parent, g) for g in group.tolist()], np.int64) if parent else group
+        self.stats["texts"] += len(texts)
+        self.stats["exact"] += len(texts) - len(unique)
+        self.stats["groups"] += len(np.unique(roots))
+        self.stats["near"] += len(unique) - len(np.unique(roots))
+        return roots
+
+    # This method returns the first text of the group of a text, given the links between groups.
+    def find(self, parent, i):
+        root = i
+        while root in parent:
+            root = parent[root]
+        while i != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    # This method joins the groups of two texts. The first text of the joined group is the first of both.
+    def join(self, parent, i, j):
+        i = self.find(parent, i)
+        j = self.find(parent, j)
+        if i != j:
+            parent[max(i, j)] = min(i, j)
+
+    # This method groups the given texts and returns the index of the text kept for each group, the number
+    # of texts in each group, and the group of each text (as its position in the list of texts kept).
+    def collapse(self, texts):
+        representatives, members, weights = np.unique(self.groups(texts), return_inverse=True, return_counts=True)
+        return representatives.tolist(), weights.tolist(), members.tolist()
+
+    # This method records how many of the grouped texts would have been scored without grouping them (the texts
+    # without a score in the score cache, which already scores equal texts only once) and how many were scored.
+    def scoring(self, uncached, scored):
+        self.stats["uncached"] += uncached
+        self.stats["scored"] += scored
+
+    # This method prints how many texts were grouped and how much of the scoring work it saved on top of the
+    # score cache.
+    def report(self):
+        s = self.stats
+        saved = 100 * (s["uncached"] - s["scored"]) / s["uncached"] if s["uncached"] else 0
+        print("Deduplication:", s["texts"], "texts,", s["exact"], "exact duplicates,", s["near"], "near duplicates,",
+              s["groups"], "groups,", s["scored"], "texts scored instead of", s["uncached"],
+              "(" + str(round(saved, 1)) + "% of the scoring saved)")
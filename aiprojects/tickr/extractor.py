@@ -0,0 +1,53 @@
+#----------------------------------------------------------------------------------#
+# This file contains the ArticleExtractor class, which gets the body and the
+# headline of a CNBC article page. Instead of building the whole page tree, it
+# only builds the parts of the page that contain the body and the headline.
+#
+# Authors: Allen Westgate, Bernardo Santos, and Ryan Farrell.
+#----------------------------------------------------------------------------------#
+
+# Import all libraries.
+from bs4 import BeautifulSoup, SoupStrainer
+
+# The lxml parser is faster than Python's, but it is an optional dependency.
+try:
+    import lxml
+    BACKENDS = ["html.parser", "lxml"]
+except ImportError:
+    BACKENDS = ["html.parser"]
+
+# Classes of the elements that contain the body and the headline of an article.
+BODY_CLASS = "ArticleBody-articleBody"
+HEADLINE_CLASS = "ArticleHeader-headline"
+
+# This is the ArticleExtractor class. It receives as input the parser used by BeautifulSoup (one of BACKENDS)
+# and whether only the body and headline should be parsed (restricted) or the whole page.
+# With the default "html.parser" backend, the text returned is exactly the same with or without the restriction.
+class ArticleExtractor:
+
+    # Constructor method of the ArticleExtractor class.
+    def __init__(self, backend="html.parser", restricted=True):
+        if backend not in BACKENDS:
+            raise ValueError("Unknown or unavailable parser: " + backend)
+        self.backend = backend
+        self.strainer = SoupStrainer(["div", "h1"], attrs={"class": [BODY_CLASS, HEADLINE_CLASS]}) if restricted else None
+
+    # This method parses the parts of the page that are needed.
+    def parse(self, page):
+        return BeautifulSoup(page, self.backend, parse_only=self.strainer)
+
+    # This method returns the text of the body of the article, or None if the page has no article body.
+    def body(self, soup):
+        article = soup.find_all("div", {"class": BODY_CLASS})
+        return article[0].get_text() if article else None
+
+    # This method returns the headline of the article as it has always been stored by the Cluster class,
+    # which is the headline element without its opening tag (i.e.: "Apple earnings beat</h1>").
+    def headline(self, soup):
+        title = soup.find("h1", {"class": HEADLINE_CLASS})
+        return str(title).replace("<h1 class=\"" + HEADLINE_CLASS + "\">", "")
+
+    # This method parses the page once and returns both the headline and the body of the article.
+    def extract(self, page):
+        soup = self.parse(page)
+        return self.headline(soup), self.body(soup)
@@ -0,0 +1,161 @@
+#----------------------------------------------------------------------------------#
+# This file contains a local server that behaves like the standard search endpoint
+# of the Twitter API, so that the TweetCollector (its token buckets, the rotation
+# of the credentials and the tweets per minute it reports) can be run without
+# Twitter. Each bearer token has its own rate limit, sent back in the same headers
+# as Twitter's, and requests over the limit get a 429 response. It is run from the
+# command line, either to run the TweetCollector against it in a temporary folder:
+#
+#      python fakesearch.py collect JPM,GS,MSFT token1,token2
+#
+# or to only serve the endpoint (at http://127.0.0.1:8000/1.1/search/tweets.json):
+#
+#      python fakesearch.py serve 8000
+#
+# Authors: Allen Westgate, Bernardo Santos, and Ryan Farrell.
+#----------------------------------------------------------------------------------#
+
+# Import all libraries.
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import datetime
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+# Path of the search endpoint, as in the Twitter API.
+SEARCH_PATH = "/1.1/search/tweets.json"
+
+# This is the SearchHandler class. It answers the search requests with the tweets of the server, newest first,
+# filtered by the since_id and max_id parameters, and counts the requests of each token.
+class SearchHandler(BaseHTTPRequestHandler):
+
+    # This method answers a search request.
+    def do_GET(self):
+        url = urlparse(self.path)
+        token = self.headers.get("Authorization", "")[len("Bearer "):]
+        if url.path != SEARCH_PATH or token not in self.server.limits:
+            return self.reply(401 if url.path == SEARCH_PATH else 404, {"errors": [{"message": "Not found"}]})
+
+        remaining, reset = self.server.take(token)
+        headers = {"x-rate-limit-limit": str(self.server.capacity), "x-rate-limit-remaining": str(max(0, remaining)),
+                   "x-rate-limit-reset": str(int(reset))}
+        if remaining < 0:
+            return self.reply(429, {"errors": [{"code": 88, "message": "Rate limit exceeded"}]}, headers)
+
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        statuses = self.server.search(params.get("q", ""), int(params.get("count", 15)),
+                                      int(params["since_id"]) if "since_id" in params else None,
+                                      int(params["max_id"]) if "max_id" in params else None)
+        self.reply(200, {"statuses": statuses}, headers)
+
+    # This method sends a JSON response with the given status and headers.
+    def reply(self, status, body, headers={}):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    # The requests are counted by the server instead of being printed.
+    def log_message(self, format, *args):
+        pass
+
+# This is the FakeSearchServer class. It receives the address to listen at, the bearer tokens it accepts, the rate
+# limit of each token (capacity requests every period seconds) and the number of tweets found for each query.
+class FakeSearchServer(ThreadingHTTPServer):
+
+    # Constructor method of the FakeSearchServer class.
+    def __init__(self, address=("127.0.0.1", 0), tokens=("token",), capacity=10, period=5, tweets=1500):
+        super().__init__(address, SearchHandler)
+        self.capacity = capacity
+        self.period = period
+        self.tweets = tweets
+        self.limits = {token: [capacity, time.time() + period] for token in tokens}
+        self.stats = {token: {"requests": 0, "limited": 0} for token in tokens}
+        self.lock = threading.Lock()
+
+    # This method returns the URL of the search endpoint of the server.
+    def endpoint(self):
+        return "http://{}:{}{}".format(self.server_address[0], self.server_address[1], SEARCH_PATH)
+
+    # This method takes one request from the window of a token. It returns the requests left in the window
+    # (negative if the request is over the limit) and the time (in seconds since the epoch) the window resets.
+    def take(self, token):
+        with self.lock:
+            limit = self.limits[token]
+            if time.time() >= limit[1]:
+                limit[:] = [self.capacity, time.time() + self.period]
+            limit[0] -= 1
+            self.stats[token]["requests"] += 1
+            if limit[0] < 0:
+                self.stats[token]["limited"] += 1
+            return limit[0], limit[1]
+
+    # This method returns at most count tweets of a query, newest first, with an id greater than since_id and at
+    # most max_id. The tweets of a query have the ids from 1 to tweets, plus a number that depends on the query,
+    # and one tweet every minute going back from now.
+    def search(self, query, count, since_id=None, max_id=None):
+        base = (zlib.crc32(query.encode("utf-8")) % 1000) * 10**9
+        newest = base + self.tweets
+        top = min(newest, max_id) if max_id is not None else newest
+        bottom = max(base, since_id) if since_id is not None else base
+        now = datetime.datetime.now(datetime.timezone.utc)
+        return [{"id": i,
+                 "created_at": (now - datetime.timedelta(minutes=newest - i)).strftime("%a %b %d %H:%M:%S %z %Y"),
+                 "full_text": "Tweet {} about {} https://t.co/x".format(i - base, query)}
+                for i in range(top, max(bottom, top - count), -1)]
+
+    # This method prints the number of requests received with each token, and how many were over the limit.
+    def report(self):
+        for token, stats in self.stats.items():
+            print("Token", token, ":", stats["requests"], "requests,", stats["limited"], "over the rate limit")
+
+# This method starts a fake search server in a thread and runs the TweetCollector against it, with the given
+# tickers (i.e.: {"JPM": "jpmorgan"}) and bearer tokens. The tweets files are written in a temporary folder.
+# It returns the tweets per minute of each ticker and the statistics of the server.
+def collect(tickers, tokens, capacity=10, period=5, tweets=1500, count=1000, workers=4):
+    from collector import TweetCollector
+
+    server = FakeSearchServer(tokens=tokens, capacity=capacity, period=period, tweets=tweets)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    folder = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            os.chdir(workdir)
+            os.makedirs("./tweets")
+            collector = TweetCollector(tokens, endpoint=server.endpoint(), workers=workers, capacity=capacity, period=period)
+            throughput = collector.Connect(tickers, count)
+            os.chdir(folder)
+    finally:
+        os.chdir(folder)
+        server.shutdown()
+        server.server_close()
+    server.report()
+    return throughput, server.stats
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "serve":
+        server = FakeSearchServer(("127.0.0.1", int(sys.argv[2]) if len(sys.argv) > 2 else 8000),
+                                  sys.argv[3].split(",") if len(sys.argv) > 3 else ["token"])
+        print("Fake search endpoint listening on", server.endpoint())
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    elif len(sys.argv) >= 2 and sys.argv[1] == "collect":
+        names = sys.argv[2].split(",") if len(sys.argv) > 2 else ["JPM", "GS", "MSFT"]
+        collect({name: name.lower() for name in names}, sys.argv[3].split(",") if len(sys.argv) > 3 else ["token1", "token2"])
+    else:
+        print("Usage: python fakesearch.py <serve [port] [tokens]|collect [tickers] [tokens]>")
+        sys.exit(1)
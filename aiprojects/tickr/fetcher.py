@@ -0,0 +1,122 @@
+#----------------------------------------------------------------------------------#
+# This file contains the Fetcher class, which downloads web pages concurrently
+# through a pooled HTTP session, retrying failed requests with backoff and
+# spacing out requests made to the same host. Pages can be served from and
+# stored in an HTTPCache.
+#
+# Authors: Allen Westgate, Bernardo Santos, and Ryan Farrell.
+#----------------------------------------------------------------------------------#
+
+# Import all libraries.
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import threading
+import time
+import requests
+
+# Status codes that are worth retrying (rate limiting and server-side errors).
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# This is the Fetcher class. All of its parameters are optional:
+#   workers: maximum number of pages downloaded at the same time.
+#   retries: number of extra attempts made for a page before giving up on it.
+#   backoff: base time (in seconds) to wait before a retry; it doubles on every attempt.
+#   delay: minimum time (in seconds) between two requests sent to the same host.
+#   timeout: time (in seconds) to wait for a server to answer.
+#   cache: HTTPCache used to avoid downloading the same page again (None to always download).
+class Fetcher:
+
+    # Constructor method of the Fetcher class.
+    def __init__(self, workers=8, retries=3, backoff=0.5, delay=0.1, timeout=15, cache=None):
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.delay = delay
+        self.timeout = timeout
+        self.cache = cache
+
+        # Share one session (and therefore its connections) between all the workers.
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # Time at which the next request to each host is allowed to start.
+        self.next_slot = {}
+        self.lock = threading.Lock()
+
+    # This method blocks until a request to the host of the given URL is allowed to start.
+    def wait_turn(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.delay
+        if slot > now:
+            time.sleep(slot - now)
+
+    # This method downloads a single page and returns its text.
+    # It raises requests.RequestException once every attempt has failed.
+    def get(self, url):
+        # Use the stored page if it is recent enough, otherwise ask the server whether it changed.
+        entry = self.cache.lookup(url) if self.cache is not None else None
+        if entry is not None and self.cache.fresh(entry):
+            text = self.cache.get(url, entry)
+            if text is not None:
+                return text
+            entry = None
+        headers = self.cache.conditional_headers(entry) if entry is not None else {}
+
+        attempt = 0
+        while True:
+            self.wait_turn(url)
+            try:
+                page = self.session.get(url, timeout=self.timeout, headers=headers)
+                if page.status_code == 304 and entry is not None:
+                    text = self.cache.get(url, entry, revalidated=True)
+                    if text is not None:
+                        return text
+
+                    # The stored page was removed in the meantime, so download it again.
+                    entry, headers = None, {}
+                    continue
+                if page.status_code not in RETRY_STATUS:
+                    page.raise_for_status()
+                    if self.cache is not None:
+                        return self.cache.put(url, page)
+                    return page.text
+                error = requests.HTTPError(str(page.status_code) + " error for " + url, response=page)
+            except requests.HTTPError:
+                raise
+            except requests.RequestException as e:
+                page = None
+                error = e
+
+            # Give up once there are no attempts left.
+            if attempt >= self.retries:
+                raise error
+
+            # Wait before trying again, honoring the Retry-After header if the server sent one.
+            wait = self.backoff * (2 ** attempt)
+            if page is not None and page.headers.get("Retry-After", "").isdigit():
+                wait = max(wait, int(page.headers["Retry-After"]))
+            time.sleep(wait)
+            attempt += 1
+
+    # This method downloads all the given URLs concurrently.
+    # It returns a list of (url, text) pairs in the same order as the input, where text is None
+    # if the page could not be downloaded.
+    def fetch_all(self, urls):
+        def fetch(url):
+            try:
+                return url, self.get(url)
+            except requests.RequestException as e:
+                print("Failed to fetch", url, str(e))
+                return url, None
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(fetch, urls))
+
+    # This method closes the connections held by the session.
+    def close(self):
+        self.session.close()
@@ -0,0 +1,145 @@
+#----------------------------------------------------------------------------------#
+# This file contains the HTTPCache class, which stores the web pages downloaded by
+# the pipeline on disk so that running it again does not download them again.
+# Pages are stored by the hash of their content, and pages older than max_age are
+# revalidated with the server (conditional requests) instead of being downloaded.
+#
+# Authors: Allen Westgate, Bernardo Santos, and Ryan Farrell.
+#----------------------------------------------------------------------------------#
+
+# Import all libraries.
+from os import path
+import hashlib
+import json
+import os
+import threading
+import time
+
+# This is the HTTPCache class. All of its parameters are optional:
+#   folder: folder where the pages and the index are stored.
+#   max_size: maximum size (in bytes) of the stored pages; the least recently used ones are removed first.
+#   max_age: time (in seconds) during which a stored page is used without asking the server if it changed.
+class HTTPCache:
+
+    # Constructor method of the HTTPCache class.
+    def __init__(self, folder="./cache", max_size=512 * 2**20, max_age=24 * 3600):
+        self.folder = folder
+        self.max_size = max_size
+        self.max_age = max_age
+        self.index_path = folder + "/index.json"
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "evictions": 0}
+
+        os.makedirs(folder + "/objects", exist_ok=True)
+        self.index = {}
+        if path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+        with self.lock:
+            self.evict()
+
+    # This method returns the path of the file containing the page with the given hash.
+    def object_path(self, digest):
+        return self.folder + "/objects/" + digest
+
+    # This method returns the stored entry of the given URL, or None if the URL is not in the cache.
+    def lookup(self, url):
+        with self.lock:
+            entry = self.index.get(url)
+            if entry is not None and not path.exists(self.object_path(entry["digest"])):
+                del self.index[url]
+                entry = None
+            return entry
+
+    # This method returns True if the entry can be used without revalidating it with the server.
+    def fresh(self, entry):
+        return time.time() - entry["fetched"] < self.max_age
+
+    # This method returns the headers that ask the server to send the page only if it changed since it was stored.
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    # This method returns the text of a stored page and marks it as recently used, or None if the page
+    # was removed in the meantime. If revalidated is True, the server confirmed that the page did not change.
+    def get(self, url, entry, revalidated=False):
+        try:
+            with open(self.object_path(entry["digest"]), "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        with self.lock:
+            entry["used"] = time.time()
+            if revalidated:
+                entry["fetched"] = entry["used"]
+                self.stats["revalidated"] += 1
+            else:
+                self.stats["hits"] += 1
+        return content.decode(entry["encoding"] or "utf-8", errors="replace")
+
+    # This method writes content to the given file. It is written next to it first and then moved over it,
+    # so that a run that stops in the middle never leaves a half written page under the hash of the full one.
+    def write(self, file_path, content):
+        temporary = "{}.tmp.{}.{}".format(file_path, os.getpid(), threading.get_ident())
+        with open(temporary, "wb") as f:
+            f.write(content)
+        os.replace(temporary, file_path)
+
+    # This method stores a page downloaded with requests and returns its text.
+    def put(self, url, page):
+        content = page.content
+        digest = hashlib.sha256(content).hexdigest()
+        encoding = page.encoding or page.apparent_encoding
+        if not path.exists(self.object_path(digest)) or path.getsize(self.object_path(digest)) != len(content):
+            self.write(self.object_path(digest), content)
+        with self.lock:
+            self.stats["misses"] += 1
+            now = time.time()
+            self.index[url] = {
+                "digest": digest,
+                "size": len(content),
+                "encoding": encoding,
+                "etag": page.headers.get("ETag"),
+                "last_modified": page.headers.get("Last-Modified"),
+                "fetched": now,
+                "used": now
+            }
+            self.evict()
+        return content.decode(encoding or "utf-8", errors="replace")
+
+    # This method removes the least recently used pages until the cache fits in max_size.
+    # Pages shared by several URLs are only counted and deleted once. It must be called holding the lock.
+    def evict(self):
+        sizes, refs = {}, {}
+        for e in self.index.values():
+            sizes[e["digest"]] = e["size"]
+            refs[e["digest"]] = refs.get(e["digest"], 0) + 1
+        total = sum(sizes.values())
+        if total <= self.max_size:
+            return
+        for url in sorted(self.index, key=lambda u: self.index[u]["used"]):
+            if total <= self.max_size:
+                break
+            digest = self.index.pop(url)["digest"]
+            self.stats["evictions"] += 1
+            refs[digest] -= 1
+            if refs[digest] == 0:
+                total -= sizes[digest]
+                if path.exists(self.object_path(digest)):
+                    os.remove(self.object_path(digest))
+
+    # This method writes the index of the cache to disk.
+    def save(self):
+        with self.lock:
+            self.write(self.index_path, json.dumps(self.index).encode("utf-8"))
+
+    # This method prints the hits, misses, revalidations and evictions since the cache was opened.
+    def report(self):
+        requests = self.stats["hits"] + self.stats["misses"] + self.stats["revalidated"]
+        rate = (self.stats["hits"] + self.stats["revalidated"]) / requests if requests else 0
+        print("HTTP cache: {} hits, {} revalidated, {} misses, {} evictions ({:.0%} served from disk)".format(
+            self.stats["hits"], self.stats["revalidated"], self.stats["misses"], self.stats["evictions"], rate))
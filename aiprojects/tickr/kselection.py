@@ -0,0 +1,162 @@
+#----------------------------------------------------------------------------------#
+# This file chooses the number of clusters of the clustering model of each company
+# (see the ClusterModel class) instead of using 10 clusters for every company. The
+# word counts of the articles are kept in a file and only the new articles are
+# counted when the database grows. A range of numbers of clusters is tried at the
+# same time in a pool of processes on a sample of the articles, and the one chosen
+# (by silhouette or by the elbow of the inertia) is saved for the ticker, i.e.:
+#
+#      python kselection.py AAPL MSFT AMZN GS JPM [--silhouette]
+#
+# Authors: Allen Westgate, Bernardo Santos, and Ryan Farrell.
+#----------------------------------------------------------------------------------#
+
+# Import all libraries.
+from os import path
+from multiprocessing import Pool
+import json
+import sys
+import time
+import numpy as np
+from scipy import sparse
+from sklearn.cluster import KMeans
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.metrics import silhouette_score
+from sklearn.preprocessing import normalize
+from clustermodel import ClusterModel, init_fit_worker
+from records import file_position, resume_offset
+
+# Number of clusters used when none was chosen for a ticker.
+DEFAULT_K = 10
+
+# TF-IDF vectors of the sample of articles, set in each process of the pool by init_sweep_worker.
+SAMPLE = None
+
+# This method returns the path of the word counts of the articles of a ticker.
+def counts_path(ticker):
+    return "./clustering/" + ticker + "-counts.npz"
+
+# This method returns the path of the number of clusters chosen for a ticker.
+def k_path(ticker):
+    return "./clustering/" + ticker + "-k.json"
+
+# This method returns the word counts of all the articles of a ticker (as a sparse matrix with one row per
+# article, or None if there is no article) and their vocabulary. The counts are kept in a file with the position
+# of the database up to which they were made, so that only the new articles are counted; new words are added at
+# the end of the vocabulary.
+def word_counts(ticker):
+    db_path = "./articles//" + ticker + "-db.txt"
+    counts, vocabulary, position = None, [], None
+    if path.exists(counts_path(ticker)):
+        with np.load(counts_path(ticker)) as data:
+            position = json.loads(str(data["position"]))
+            vocabulary = data["vocabulary"].tolist()
+            counts = sparse.csr_matrix((data["data"], data["indices"], data["indptr"]), shape=tuple(data["shape"]))
+    offset = resume_offset(db_path, position)
+    if offset == 0:
+        counts, vocabulary = None, []
+    _, texts, end = ClusterModel.read(db_path, offset)
+    if not texts:
+        return counts, vocabulary
+
+    # Count the words of the new articles, and move their columns to the columns of the same words.
+    vectorizer = CountVectorizer(stop_words="english")
+    new_counts = vectorizer.fit_transform(texts).tocsr()
+    columns = {word: i for i, word in enumerate(vocabulary)}
+    new_words = vectorizer.get_feature_names_out().tolist()
+    for word in new_words:
+        if word not in columns:
+            columns[word] = len(vocabulary)
+            vocabulary.append(word)
+    mapping = np.array([columns[word] for word in new_words], dtype=np.int64)
+    new_counts = sparse.csr_matrix((new_counts.data, mapping[new_counts.indices], new_counts.indptr),
+                                   shape=(new_counts.shape[0], len(vocabulary)))
+    if counts is not None:
+        counts.resize((counts.shape[0], len(vocabulary)))
+        counts = sparse.vstack([counts, new_counts], format="csr")
+    else:
+        counts = new_counts
+
+    np.savez(counts_path(ticker), position=json.dumps(file_position(db_path, end)), vocabulary=np.array(vocabulary, dtype=str),
+             data=counts.data, indices=counts.indices, indptr=counts.indptr, shape=np.array(counts.shape))
+    return counts, vocabulary
+
+# This method returns the TF-IDF vectors (normalized to length 1) of the given word counts, with the same
+# weights as the ClusterModel class.
+def tfidf(counts):
+    document_counts = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = np.log((1 + counts.shape[0]) / (1 + document_counts)) + 1
+    return normalize(counts @ sparse.diags(idf))
+
+# This method sets up a process of the pool that tries the numbers of clusters on the given sample of articles.
+def init_sweep_worker(sample, threads=1):
+    global SAMPLE
+    SAMPLE = sample
+    init_fit_worker(threads)
+
+# This method fits K-means with k clusters on the sample of articles and returns k, the inertia and the
+# silhouette of the clusters.
+def score_k(k, n_init=3, seed=0):
+    model = KMeans(n_clusters=k, init='k-means++', max_iter=100, n_init=n_init, random_state=seed)
+    labels = model.fit_predict(SAMPLE)
+    silhouette = silhouette_score(SAMPLE, labels) if 1 < len(set(labels.tolist())) < SAMPLE.shape[0] else -1.0
+    return k, float(model.inertia_), float(silhouette)
+
+# This method returns the number of clusters at the elbow of the inertia: the one farthest from the line
+# between the inertia of the first and of the last number of clusters tried.
+def elbow(ks, inertias):
+    x = (np.asarray(ks, dtype=np.float64) - ks[0]) / max(ks[-1] - ks[0], 1)
+    y = np.asarray(inertias, dtype=np.float64)
+    y = (y - y[-1]) / max(y[0] - y[-1], 1e-12)
+    return ks[int(np.argmax(1 - x - y))]
+
+# This method chooses the number of clusters of a ticker among ks, by the elbow of the inertia or by the highest
+# silhouette (criterion "elbow" or "silhouette"; the silhouette of short texts tends to keep growing with k),
+# trying them on a random sample of at most sample articles in a pool of processes, each using at most threads
+# threads. The choice and the scores are saved and returned.
+def select_k(ticker, ks=range(2, 21), criterion="elbow", sample=2000, processes=4, threads=1, seed=0):
+    timer = time.perf_counter()
+    counts = word_counts(ticker)[0]
+    if counts is None:
+        return DEFAULT_K
+    X = tfidf(counts)
+    rows = np.random.default_rng(seed).choice(X.shape[0], min(sample, X.shape[0]), replace=False)
+    rows.sort()
+    subset = X[rows]
+    ks = [k for k in ks if 1 < k < subset.shape[0]]
+    if not ks:
+        return DEFAULT_K
+
+    if processes > 1:
+        with Pool(min(processes, len(ks)), initializer=init_sweep_worker, initargs=(subset, threads)) as pool:
+            scores = pool.map(score_k, ks)
+    else:
+        init_sweep_worker(subset, threads)
+        scores = [score_k(k) for k in ks]
+    inertias = [inertia for _, inertia, _ in scores]
+    silhouettes = [silhouette for _, _, silhouette in scores]
+    k = elbow(ks, inertias) if criterion == "elbow" else ks[int(np.argmax(silhouettes))]
+
+    result = {"k": int(k), "criterion": criterion, "articles": int(X.shape[0]), "sample": int(subset.shape[0]),
+              "scores": {str(k): {"inertia": inertia, "silhouette": silhouette} for k, inertia, silhouette in scores}}
+    with open(k_path(ticker), "w+") as f:
+        json.dump(result, f)
+    print(ticker, "k =", k, "by", criterion, "on", subset.shape[0], "of", X.shape[0], "articles",
+          "(" + str(round(time.perf_counter() - timer, 2)) + "s)")
+    return k
+
+# This method returns the number of clusters chosen for a ticker, or the default one if none was chosen yet.
+def saved_k(ticker):
+    if not path.exists(k_path(ticker)):
+        return DEFAULT_K
+    with open(k_path(ticker), "r") as f:
+        return json.load(f)["k"]
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python kselection.py <TICKER> [<TICKER> ...] [--silhouette]")
+        sys.exit(1)
+    criterion = "silhouette" if "--silhouette" in sys.argv else "elbow"
+    for ticker in sys.argv[1:]:
+        if not ticker.startswith("--"):
+            select_k(ticker, criterion=criterion)
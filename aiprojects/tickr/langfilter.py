@@ -0,0 +1,54 @@
+#----------------------------------------------------------------------------------#
+# This file contains the EnglishFilter class, which guesses if a cleaned tweet is in
+# English from its characters and words, with the English stop words and vocabulary
+# of NLTK. It is much cheaper than matching and scoring the tweet, so the tweets in
+# other languages are dropped before those steps.
+#
+# Authors: Allen Westgate, Bernardo Santos, and Ryan Farrell.
+#----------------------------------------------------------------------------------#
+
+# Import all libraries.
+import re
+
+# Letters out of the English alphabet (i.e.: Thai, Korean or accented letters), and letters of the English alphabet.
+FOREIGN_LETTER = re.compile(r"[^\W\d_a-zA-Z]")
+ENGLISH_LETTER = re.compile(r"[a-zA-Z]")
+
+# Endings removed from a word that is not in the vocabulary, since the vocabulary has no plurals or verb forms.
+SUFFIXES = ["s", "es", "ed", "d", "ing", "ly"]
+
+# This is the EnglishFilter class. It receives the English stop words and vocabulary as input (i.e.: the sets built
+# by the Analyzer). A tweet is in English unless more than max_foreign of its letters are out of the English alphabet,
+# or less than min_known of its words are English words. Tweets with fewer than min_words words are kept, since there
+# is not enough to tell their language.
+class EnglishFilter:
+
+    # Constructor method of the EnglishFilter class.
+    def __init__(self, stop_words, vocab, min_known=0.5, max_foreign=0.3, min_words=4):
+        self.stop_words = stop_words
+        self.vocab = vocab
+        self.min_known = min_known
+        self.max_foreign = max_foreign
+        self.min_words = min_words
+
+    # This method returns True if a word (in lower case) is an English word.
+    def known(self, word):
+        if word in self.stop_words or word in self.vocab:
+            return True
+        for suffix in SUFFIXES:
+            if word.endswith(suffix) and word[:-len(suffix)] in self.vocab:
+                return True
+        return False
+
+    # This method returns True if a cleaned tweet (in lower case) is in English.
+    def is_english(self, text):
+        if not text.isascii():
+            foreign = len(FOREIGN_LETTER.findall(text))
+            if foreign > self.max_foreign * (foreign + len(ENGLISH_LETTER.findall(text))):
+                return False
+
+        # Words with digits or other characters (i.e.: prices, links or emojis) say nothing about the language.
+        words = [w for w in text.split() if w.isalpha() and w.isascii()]
+        if len(words) < self.min_words:
+            return True
+        return sum(1 for w in words if self.known(w)) >= self.min_known * len(words)
@@ -0,0 +1,74 @@
+#----------------------------------------------------------------------------------#
+# This file contains the LinkIndex class, which keeps track of the CNBC articles
+# that have already been scraped for a company, so that the following runs only
+# need to download the articles that were not seen before.
+#
+# Authors: Allen Westgate, Bernardo Santos, and Ryan Farrell.
+#----------------------------------------------------------------------------------#
+
+# Import all libraries.
+from os import path
+from records import read_records
+import hashlib
+import json
+import time
+
+# This method returns the hash of the body of an article, ignoring surrounding whitespace.
+def content_hash(text):
+    return hashlib.sha1(text.strip().encode("utf-8")).hexdigest()
+
+# This method removes the query string from a link, since the same article is found
+# under different search terms (i.e.: "...html?&qsearchterm=apple").
+def normalize_link(link):
+    return link.strip().split("?")[0]
+
+# This is the LinkIndex class. It receives the ticker of the company as input and stores, for each
+# article link, the date of the article, the hash of its body and the time it was added to the index.
+class LinkIndex:
+
+    # Constructor method of the LinkIndex class.
+    def __init__(self, ticker):
+        self.ticker = ticker
+        self.path = "./links//" + ticker + "-index.json"
+        self.links = {}
+        self.hashes = set()
+
+        if path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.links = json.load(f)
+            self.hashes = set(e["hash"] for e in self.links.values() if e["hash"])
+        self.seed()
+
+    # This method fills the set of known hashes with the articles already stored in the database,
+    # so that articles scraped before the index existed are not appended a second time.
+    def seed(self):
+        db = "./articles//" + self.ticker + "-db.txt"
+        if not path.exists(db):
+            return
+        for _, body in read_records(db):
+            self.hashes.add(content_hash(body))
+
+    # This method returns True if the given link has already been scraped.
+    def seen(self, link):
+        return normalize_link(link) in self.links
+
+    # This method returns True if an article with the same body is already stored.
+    def known(self, text):
+        return content_hash(text) in self.hashes
+
+    # This method adds a link to the index. The text is None for pages that have no article body
+    # (i.e.: videos), so that they are not downloaded again.
+    def add(self, link, date, text):
+        digest = content_hash(text) if text is not None else None
+        self.links[normalize_link(link)] = {"date": date, "hash": digest, "added": time.time()}
+        if digest:
+            self.hashes.add(digest)
+
+    # This method returns the links added to the index since the given time (in seconds since the epoch).
+    def added_since(self, since):
+        return [l for l, e in self.links.items() if e["added"] >= since]
+
+    # This method writes the index to its file.
+    def save(self):
+        with open(self.path, "w+", encoding="utf-8") as f:
+            json.dump(self.links, f)
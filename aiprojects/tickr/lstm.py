@@ -10,13 +10,13 @@ import math
 import torch
 import numpy as np
 import pandas as pd
-import pandas_datareader as web
 import yfinance as yf
 import tensorflow as tf
 from sklearn.preprocessing import MinMaxScaler
 from keras.models import Sequential
 from keras.layers import Dense, LSTM, Activation
 from sklearn.metrics import r2_score
+from pricestore import price_history
 pd.options.mode.chained_assignment = None
 
 # This is the LSTM Model class, which receives a limit date for data retrieval from the Yahoo Finance API (i.e.: 2021-05-07);
@@ -35,7 +35,7 @@ class LSTMPredictor:
 
         # Train, test, and save a model for each of the tickers received as input in the constructor.
         for ticker in self.tickers:
-            df = web.DataReader(ticker, data_source='yahoo', start='2010-01-01', end=self.limit) # Get stock historical data from Yahoo Finance API.
+            df = price_history(ticker, '2010-01-01', self.limit) # Get stock historical data from the price store (see pricestore.py).
 
             # Get the column that is important to us, which is the 'Close' column.
             close_df = df.filter(['Close'])
@@ -91,7 +91,7 @@ class LSTMPredictor:
             print("R^2:", r2_score(valid['Close'].values, valid['Predictions'].values))
 
             # Test the model again to predict for tomorrow.
-            quote = web.DataReader(ticker,data_source='yahoo', start='2010-01-01', end=self.limit)
+            quote = df
             new_df = quote.filter(['Close'])
             last_data = new_df[-self.train_size:].values
             last_data_scaled = scaler.transform(last_data)
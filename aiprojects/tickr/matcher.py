@@ -0,0 +1,74 @@
+#----------------------------------------------------------------------------------#
+# This file contains the KeywordMatcher class, which finds which tickers a text
+# mentions, given the keywords of each ticker (company names, products, people...).
+# All the keywords are compiled into a single automaton (Aho-Corasick), so a text
+# is scanned only once no matter how many tickers and keywords there are.
+#
+# Authors: Allen Westgate, Bernardo Santos, and Ryan Farrell.
+#----------------------------------------------------------------------------------#
+
+# Import all libraries.
+from collections import deque
+
+# This is the KeywordMatcher class. It receives a dictionary of tickers as input, with the keywords of each
+# ticker as values (i.e.: {'GS': ['goldman sachs', 'goldman', 'sachs', 'gs']}). A ticker is mentioned by a
+# text if any of its keywords appears anywhere in the text, like the "keyword in text" test.
+class KeywordMatcher:
+
+    # Constructor method of the KeywordMatcher class, which builds the automaton.
+    def __init__(self, tickers):
+        # Each state of the automaton has its transitions (character -> state) and the tickers whose
+        # keywords end at that state. State 0 is the start state.
+        self.goto = [{}]
+        self.output = [set()]
+        for ticker, keywords in tickers.items():
+            for keyword in keywords:
+                state = 0
+                for c in keyword:
+                    if c not in self.goto[state]:
+                        self.goto[state][c] = len(self.goto)
+                        self.goto.append({})
+                        self.output.append(set())
+                    state = self.goto[state][c]
+                self.output[state].add(ticker)
+
+        # The failure state of each state is the longest proper suffix of its text that is also a state.
+        # States are visited by depth, so the failure state of a state's parent is always known already.
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for c, child in self.goto[state].items():
+                queue.append(child)
+                f = self.fail[state]
+                while f and c not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[child] = self.goto[f].get(c, 0)
+                self.output[child] |= self.output[self.fail[child]]
+
+    # This method moves the automaton from a state with the next character of a text.
+    def step(self, state, c):
+        while state and c not in self.goto[state]:
+            state = self.fail[state]
+        return self.goto[state].get(c, 0)
+
+    # This method returns the set of tickers mentioned by the text.
+    def tickers_in(self, text):
+        found = set(self.output[0])
+        state = 0
+        for c in text:
+            state = self.step(state, c)
+            if self.output[state]:
+                found |= self.output[state]
+        return found
+
+    # This method returns True if the text mentions the given ticker, stopping as soon as it finds it.
+    def mentions(self, text, ticker):
+        if ticker in self.output[0]:
+            return True
+        state = 0
+        for c in text:
+            state = self.step(state, c)
+            if ticker in self.output[state]:
+                return True
+        return False
@@ -0,0 +1,130 @@
+#----------------------------------------------------------------------------------#
+# This file contains the PriceStore class, which keeps the daily price history (open,
+# high, low, close, adjusted close and volume) of each ticker in a file, one array
+# per column with the days in order, so that the LSTM models, the dashboard and the
+# clustering read the prices from disk and only the days that are missing are
+# downloaded from Yahoo Finance, i.e.:
+#
+#      df = price_history("AAPL", "2010-01-01", "2021-05-07")
+#
+# Authors: Allen Westgate, Bernardo Santos, and Ryan Farrell.
+#----------------------------------------------------------------------------------#
+
+# Import all libraries.
+from os import path
+import os
+import threading
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+# Columns of the price history, with the names used by Yahoo Finance.
+COLUMNS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+# Names of the arrays of the columns in the files of the store.
+KEYS = ["open", "high", "low", "close", "adj_close", "volume"]
+
+# Number of days in a row without prices (a weekend and a holiday) that may follow or precede the prices of a download.
+SLACK = np.timedelta64(4, "D")
+
+# This is the PriceStore class. It receives the folder of the files of the store as input.
+# The file of each ticker also keeps the range of days that was already downloaded, so that the days without
+# prices between the days downloaded (weekends and holidays) are not asked for again.
+class PriceStore:
+
+    # Constructor method of the PriceStore class.
+    def __init__(self, folder="./prices"):
+        self.folder = folder
+        self.lock = threading.Lock()
+        self.locks = {}
+        os.makedirs(folder, exist_ok=True)
+
+    # This method returns the path of the file of a ticker.
+    def file_path(self, ticker):
+        return self.folder + "/" + ticker + ".npz"
+
+    # This method returns the lock of a ticker, so that its file is only updated by one thread at a time.
+    def ticker_lock(self, ticker):
+        with self.lock:
+            return self.locks.setdefault(ticker, threading.Lock())
+
+    # This method returns the saved price history of a ticker (as a DataFrame indexed by date, with the COLUMNS)
+    # and the first and last days downloaded, or an empty history and None if there is none.
+    def load(self, ticker):
+        if not path.exists(self.file_path(ticker)):
+            return pd.DataFrame(columns=COLUMNS, index=pd.DatetimeIndex([], name="Date"), dtype=np.float64), None
+        with np.load(self.file_path(ticker)) as data:
+            df = pd.DataFrame({column: data[key] for column, key in zip(COLUMNS, KEYS)},
+                              index=pd.DatetimeIndex(data["dates"].astype("datetime64[ns]"), name="Date"))
+            covered = (data["covered"][0], data["covered"][1])
+        return df, covered
+
+    # This method saves the price history of a ticker and the first and last days downloaded. The file is
+    # written next to the old one and then moved over it, so that it is never left half written.
+    def save(self, ticker, df, covered):
+        columns = {key: df[column].to_numpy(dtype=np.int64 if key == "volume" else np.float64) for column, key in zip(COLUMNS, KEYS)}
+        temporary = self.file_path(ticker) + ".tmp.npz"
+        np.savez(temporary, dates=df.index.to_numpy().astype("datetime64[D]"), covered=np.array(covered, dtype="datetime64[D]"), **columns)
+        os.replace(temporary, self.file_path(ticker))
+
+    # This method downloads the price history of a ticker from the first to the last given day (both included).
+    def download(self, ticker, first, last):
+        hist = yf.Ticker(ticker).history(start=str(first), end=str(last + np.timedelta64(1, "D")), auto_adjust=False, actions=False)
+        if len(hist) == 0:
+            return pd.DataFrame(columns=COLUMNS, index=pd.DatetimeIndex([], name="Date"), dtype=np.float64)
+        days = hist.index.tz_localize(None) if hist.index.tz is not None else hist.index
+        hist.index = pd.DatetimeIndex(days.normalize().astype("datetime64[ns]"), name="Date")
+        if "Adj Close" not in hist:
+            hist["Adj Close"] = hist["Close"]
+        return hist[COLUMNS]
+
+    # This method returns the price history of a ticker from start to end (as "YYYY-MM-DD", both included; end is
+    # today if not given), in the format of Yahoo Finance. Only the days before the first or after the last day
+    # already downloaded are downloaded and added to the file. The days up to yesterday are not downloaded again,
+    # but today is, since its prices may still change.
+    def history(self, ticker, start="2010-01-01", end=None):
+        today = np.datetime64("today", "D")
+        start = np.datetime64(start, "D")
+        end = min(np.datetime64(end, "D"), today) if end is not None else today
+        with self.ticker_lock(ticker):
+            df, covered = self.load(ticker)
+            if covered is None:
+                missing = [(start, end)]
+            else:
+                missing = [(start, covered[0] - np.timedelta64(1, "D")), (covered[1] + np.timedelta64(1, "D"), end)]
+            missing = [(first, last) for first, last in missing if first <= last]
+            final = min(end, today - np.timedelta64(1, "D"))
+            parts = []
+            for first, last in missing:
+                part = self.download(ticker, first, last)
+
+                # A download that came back empty (i.e.: because of the rate limit or a network error) does not
+                # cover anything, so that it is asked for again. Otherwise, the days covered only go as far as
+                # the prices that came back, plus the days without prices that may follow or precede them.
+                if not len(part):
+                    continue
+                parts.append(part)
+                low = max(first, part.index[0].to_datetime64().astype("datetime64[D]") - SLACK)
+                high = min(last, final, part.index[-1].to_datetime64().astype("datetime64[D]") + SLACK)
+                if covered is None:
+                    covered = (low, max(low, high))
+                else:
+                    covered = (min(covered[0], low), max(covered[1], high))
+
+            # The new prices replace the saved ones of the same days.
+            if parts:
+                df = pd.concat([df] + parts) if len(df) else pd.concat(parts)
+                df = df[~df.index.duplicated(keep="last")].sort_index()
+                self.save(ticker, df, covered)
+        return df.loc[str(start):str(end)].copy()
+
+# Store used by the price_history method.
+STORE = None
+
+# This method returns the price history of a ticker from start to end (see the PriceStore.history method), from
+# the store in ./prices.
+def price_history(ticker, start="2010-01-01", end=None):
+    global STORE
+    if STORE is None:
+        STORE = PriceStore()
+    return STORE.history(ticker, start, end)
@@ -0,0 +1,108 @@
+#----------------------------------------------------------------------------------#
+# This file reads the articles database files (articles/<TICKER>-db.txt), where each
+# article is a date, a comma and the body of the article, followed by an empty line
+# (i.e.: "2021/05/07, Apple and Epic Games have been facing off..."). The articles
+# are read one at a time from a small buffer or a memory map of the file, so the
+# memory used does not grow with the size of the file.
+#
+# Authors: Allen Westgate, Bernardo Santos, and Ryan Farrell.
+#----------------------------------------------------------------------------------#
+
+# Import all libraries.
+from os import path
+import hashlib
+import mmap
+
+# Number of bytes read from the file at a time.
+BLOCK = 1 << 20
+
+# Number of bytes before a position of a file that are checked to find out if the file was rewritten since.
+TAIL = 4096
+
+# This method returns the blocks of a file opened in binary mode from the given offset, read with read calls,
+# or copied from a memory map of the file if memory_map is True.
+def file_blocks(f, offset=0, memory_map=False):
+    if memory_map:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return
+        try:
+            for start in range(offset, len(data), BLOCK):
+                yield data[start:start + BLOCK]
+        finally:
+            data.close()
+        return
+    f.seek(offset)
+    block = f.read(BLOCK)
+    while block:
+        yield block
+        block = f.read(BLOCK)
+
+# This method returns the lines of a file opened in binary mode from the given offset, one at a time, as
+# (line, end) pairs: the bytes of the line without its new line ("\n", "\r\n" or "\r", as in a file opened in
+# text mode), and the offset after the new line. The last line is returned with an end of None if it does not
+# end with a new line. If memory_map is True, the file is read through a memory map (see file_blocks).
+def file_lines(f, offset=0, memory_map=False):
+    buffer = b""
+    end = offset
+    for block in file_blocks(f, offset, memory_map):
+        lines = (buffer + block).splitlines(True)
+
+        # The last line is kept for the next block if it has no new line yet, or if it ends with a "\r" that may
+        # be the start of a "\r\n" split between two blocks.
+        buffer = lines.pop()
+        if buffer.endswith(b"\n"):
+            lines.append(buffer)
+            buffer = b""
+        for line in lines:
+            end += len(line)
+            yield line.rstrip(b"\r\n"), end
+    if buffer.endswith(b"\r"):
+        yield buffer[:-1], end + len(buffer)
+    elif buffer:
+        yield buffer, None
+
+# This method returns the articles of a database file from the given offset, one at a time, as (text, end) pairs:
+# the text of the article (its lines up to the next empty line, each ending with "\n" as in a file opened in text
+# mode) and the offset after the empty line. The lines after the last empty line are only returned (with an end
+# of None) if partial is True, since the last article may still be being written.
+def raw_records(db_path, offset=0, memory_map=False, partial=False):
+    with open(db_path, "rb") as f:
+        lines = []
+        for line, end in file_lines(f, offset, memory_map):
+            if line or end is None:
+                lines.append(line.decode("utf-8") + ("\n" if end is not None else ""))
+            if not line and end is not None:
+                yield "".join(lines), end
+                lines = []
+        if partial and lines:
+            yield "".join(lines), None
+
+# This method splits the text of an article in its date and body: the text before the first comma (i.e.:
+# "2021/05/07", or None if there is no comma) and the text after it.
+def split_record(text):
+    date, comma, body = text.partition(",")
+    return (date.strip(), body) if comma else (None, text)
+
+# This method returns the articles of a database file, one at a time, as (date, body) pairs (see split_record).
+# Empty articles are skipped, and the last article is returned even if it is not followed by an empty line yet.
+def read_records(db_path, memory_map=False):
+    for text, _ in raw_records(db_path, memory_map=memory_map, partial=True):
+        if text.strip():
+            yield split_record(text)
+
+# This method returns the position of a file to keep in the state: the path of the file, the offset up to which
+# it was read, and a hash of the bytes before the offset.
+def file_position(file_path, offset):
+    with open(file_path, "rb") as f:
+        f.seek(max(0, offset - TAIL))
+        tail = f.read(offset - max(0, offset - TAIL))
+    return {"path": file_path, "offset": offset, "tail": hashlib.sha1(tail).hexdigest()}
+
+# This method returns the offset from which a file has to be read, given its position kept in the state:
+# the offset kept if the file still has the same bytes before it, or 0 if the file was rewritten or replaced.
+def resume_offset(file_path, position):
+    if position is None or position["path"] != file_path or path.getsize(file_path) < position["offset"]:
+        return 0
+    return position["offset"] if file_position(file_path, position["offset"])["tail"] == position["tail"] else 0
@@ -0,0 +1,142 @@
+#----------------------------------------------------------------------------------#
+# This file loads the NLTK resources used by the project (stop words, English words
+# and the VADER lexicon) the first time they are needed. Resources already on this
+# machine are used without going online; the missing ones are downloaded to a
+# local folder. Each resource is checked once and recorded in a manifest, so later
+# runs find it without searching the NLTK folders or even importing NLTK.
+#
+# Authors: Allen Westgate, Bernardo Santos, and Ryan Farrell.
+#----------------------------------------------------------------------------------#
+
+# Import all libraries.
+from os import path
+import os
+import json
+import zipfile
+
+# Local folder where missing resources are downloaded, and the manifest of the resources already checked.
+DATA_DIR = "./nltk_data"
+MANIFEST = DATA_DIR + "/verified.json"
+
+# Path of each resource in the NLTK data folders.
+RESOURCES = {
+    "stopwords": "corpora/stopwords",
+    "words": "corpora/words",
+    "vader_lexicon": "sentiment/vader_lexicon.zip",
+}
+
+# Resources already loaded by the current process.
+LOADED = {}
+
+# This method returns a fingerprint of a resource file or folder (its size and modification time, and those of the
+# files inside it), used to find out if it changed since it was checked.
+def fingerprint(file_path):
+    if path.isdir(file_path):
+        return [[name, path.getsize(path.join(file_path, name)), int(path.getmtime(path.join(file_path, name)))]
+                for name in sorted(os.listdir(file_path))]
+    return [path.getsize(file_path), int(path.getmtime(file_path))]
+
+# This method checks that a resource file or folder can be read: a zip file must have no corrupted member, and a
+# folder must have at least one file that is not empty.
+def verify(file_path):
+    if path.isdir(file_path):
+        return any(path.isfile(path.join(file_path, n)) and path.getsize(path.join(file_path, n)) > 0 for n in os.listdir(file_path))
+    try:
+        with zipfile.ZipFile(file_path) as z:
+            return z.testzip() is None
+    except zipfile.BadZipFile:
+        return False
+
+# This method reads the manifest of the resources already checked.
+def read_manifest():
+    if path.exists(MANIFEST):
+        with open(MANIFEST, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+# This method adds a resource to the manifest. The manifest is replaced at once, since several processes
+# (i.e.: the workers of the Analyzer) may update it at the same time.
+def record(name, entry):
+    manifest = read_manifest()
+    manifest[name] = entry
+    if not path.exists(DATA_DIR):
+        os.makedirs(DATA_DIR)
+    temporary = MANIFEST + "." + str(os.getpid())
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(temporary, MANIFEST)
+
+# This method searches the NLTK data folders (the local folder first) for a resource and returns the path of its
+# file or folder and the data folder it is in, or None if it is not on this machine.
+def find(name):
+    import nltk
+    if path.abspath(DATA_DIR) not in nltk.data.path:
+        nltk.data.path.insert(0, path.abspath(DATA_DIR))
+    try:
+        pointer = nltk.data.find(RESOURCES[name])
+    except LookupError:
+        return None
+    file_path = pointer.zipfile.filename if hasattr(pointer, "zipfile") else pointer.path
+    relative = RESOURCES[name] if file_path.endswith(RESOURCES[name]) else RESOURCES[name] + ".zip"
+    return {"path": file_path, "root": file_path[:-len(relative) - 1]}
+
+# This method returns the path of a resource and the data folder it is in (as a {"path", "root"} dictionary).
+# The manifest is used if the resource did not change since it was checked; otherwise the resource is searched
+# for on this machine, downloaded to the local folder if it is missing, and checked.
+def require(name):
+    entry = read_manifest().get(name)
+    if entry is not None and path.exists(entry["path"]) and fingerprint(entry["path"]) == entry["fingerprint"]:
+        return entry
+
+    found = find(name)
+    if found is None or not verify(found["path"]):
+        import nltk
+        print("Downloading NLTK resource", name, "to", DATA_DIR)
+        if not nltk.download(name, download_dir=path.abspath(DATA_DIR), quiet=True):
+            raise LookupError("NLTK resource " + name + " is missing and could not be downloaded")
+        found = find(name)
+        if found is None or not verify(found["path"]):
+            raise LookupError("NLTK resource " + name + " could not be read")
+    found["fingerprint"] = fingerprint(found["path"])
+    record(name, found)
+    return found
+
+# This method returns the lines of the files of a word list resource (i.e.: the "english" file of the stop words),
+# or of all its files but the README if no file names are given, read from its folder or zip file.
+def word_list(name, fileids=None):
+    entry = require(name)
+    folder = path.basename(RESOURCES[name])
+    lines = []
+    if path.isdir(entry["path"]):
+        for fileid in fileids or [n for n in sorted(os.listdir(entry["path"])) if n != "README" and not n.startswith(".")]:
+            with open(path.join(entry["path"], fileid), "r", encoding="utf-8") as f:
+                lines.extend(f.read().splitlines())
+    else:
+        with zipfile.ZipFile(entry["path"]) as z:
+            names = [n[len(folder) + 1:] for n in z.namelist() if n.startswith(folder + "/") and not n.endswith("/")]
+            for fileid in fileids or [n for n in sorted(names) if n != "README" and not n.startswith(".")]:
+                lines.extend(z.read(folder + "/" + fileid).decode("utf-8").splitlines())
+    return [line for line in lines if line]
+
+# This method returns the set of English stop words.
+def stop_words():
+    if "stopwords" not in LOADED:
+        LOADED["stopwords"] = set(word_list("stopwords", ["english"]))
+    return LOADED["stopwords"]
+
+# This method returns the set of English words (in lower case).
+def english_vocab():
+    if "words" not in LOADED:
+        LOADED["words"] = set(w.lower() for w in word_list("words"))
+    return LOADED["words"]
+
+# This method returns the VADER sentiment analyzer of NLTK, created once per process.
+def sentiment_analyzer():
+    if "vader_lexicon" not in LOADED:
+        entry = require("vader_lexicon")
+        import nltk
+        from nltk.sentiment import SentimentIntensityAnalyzer
+        if entry["root"] not in nltk.data.path:
+            nltk.data.path.insert(0, entry["root"])
+        LOADED["vader_lexicon"] = SentimentIntensityAnalyzer()
+    return LOADED["vader_lexicon"]
@@ -0,0 +1,76 @@
+#----------------------------------------------------------------------------------#
+# This file contains the ScoreCache class, which keeps the sentiment score of every
+# text already analyzed, so that a text is only scored once. The scores of each
+# version of the sentiment model are kept in their own file, which is only ever
+# appended to.
+#
+# Authors: Allen Westgate, Bernardo Santos, and Ryan Farrell.
+#----------------------------------------------------------------------------------#
+
+# Import all libraries.
+from os import path
+import os
+import hashlib
+import numpy as np
+
+# Each entry of the cache is the hash of a text and its compound score.
+ENTRY_DTYPE = np.dtype([("key", "<u8"), ("score", "<f8")])
+
+# This method returns the key of a text in the cache: a 64 bits hash of the text.
+def text_key(text):
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+# This is the ScoreCache class. It receives the version of the sentiment model as input (see vader.model_version),
+# and the scores are kept in <folder>/<version>.bin (i.e.: ./sentiments/scores/vader-1a2b3c4d5e6f.bin).
+class ScoreCache:
+
+    # Constructor method of the ScoreCache class.
+    def __init__(self, version, folder="./sentiments/scores"):
+        self.version = version
+        self.path = folder + "/" + version + ".bin"
+        self.new = []
+        if not path.exists(folder):
+            os.makedirs(folder)
+        self.load()
+
+    # This method loads the scores of the cache. Bytes after the last complete entry (i.e.: if a run was
+    # interrupted while saving) are ignored.
+    def load(self):
+        self.scores = {}
+        if path.exists(self.path):
+            with open(self.path, "rb") as f:
+                data = f.read()
+            entries = np.frombuffer(data[:len(data) - len(data) % ENTRY_DTYPE.itemsize], dtype=ENTRY_DTYPE)
+            self.scores = dict(zip(entries["key"].tolist(), entries["score"].tolist()))
+
+    # This method returns the number of scores in the cache.
+    def __len__(self):
+        return len(self.scores)
+
+    # This method returns the texts (out of the given ones) that have no score in the cache, without repetitions.
+    def missing(self, texts):
+        missing = {}
+        for text in texts:
+            key = text_key(text)
+            if key not in self.scores and key not in missing:
+                missing[key] = text
+        return list(missing.values())
+
+    # This method adds the scores of the given texts to the cache.
+    def add(self, texts, scores):
+        for text, score in zip(texts, scores):
+            key = text_key(text)
+            if key not in self.scores:
+                self.scores[key] = score
+                self.new.append((key, score))
+
+    # This method returns the scores of the given texts, which must all be in the cache.
+    def get(self, texts):
+        return [self.scores[text_key(text)] for text in texts]
+
+    # This method appends the scores added since the last save to the cache file.
+    def save(self):
+        if self.new:
+            with open(self.path, "ab") as f:
+                np.array(self.new, dtype=ENTRY_DTYPE).tofile(f)
+            self.new = []
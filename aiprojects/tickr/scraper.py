@@ -7,12 +7,13 @@
 #----------------------------------------------------------------------------------# 
 
 # Import all libraries.
-from bs4 import BeautifulSoup
-from msedge.selenium_tools import EdgeOptions, Edge
-from selenium import webdriver
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
-import time
-import requests
+from browser import BrowserPool, open_tabs, close_tabs, wait_for_results, scroll_to_end, search_url, extract_result_links, PhaseTimer
+from concurrent.futures import ThreadPoolExecutor
+from extractor import ArticleExtractor
+from fetcher import Fetcher
+from httpcache import HTTPCache
+from linkindex import LinkIndex
+from os import path
 import yfinance as yf
 import re
 import pandas as pd
@@ -22,93 +23,146 @@ import pandas as pd
 class Scraper:
 
     # Constructor method of the Scraper class.
-    # Input: a dictionary with keys as tickers and values as names of the companies, i.e.: {"JPM": "jpmorgan"}.
-    def __init__(self, data_in):
+    # Input: a dictionary with keys as tickers and values as names of the companies, i.e.: {"JPM": "jpmorgan"},
+    # and (optionally) the maximum number of articles downloaded at the same time.
+    # If incremental is True, the links and articles files are kept and only the articles that were not
+    # scraped in a previous run are downloaded and appended to them.
+    # The timeout is the maximum time (in seconds) to wait for the search page to load.
+    # The pool is a BrowserPool shared with other classes; if none is given, a headless browser is started
+    # for this scraper and closed once the search pages have been crawled. Each browser session crawls
+    # the search pages of up to tabs tickers at the same time.
+    # The parser is the BeautifulSoup backend used to get the body of the articles (see extractor.py).
+    # The cache is the HTTPCache the articles are downloaded through; if none is given, the default one in ./cache is used.
+    def __init__(self, data_in, workers=8, incremental=False, timeout=15, pool=None, tabs=3, parser="html.parser", cache=None):
         self.data_in = data_in
+        self.cache = HTTPCache() if cache is None else cache
+        self.fetcher = Fetcher(workers=workers, cache=self.cache)
+        self.incremental = incremental
+        self.timeout = timeout
+        self.own_pool = pool is None
+        self.pool = BrowserPool() if pool is None else pool
+        self.tabs = tabs
+        self.extractor = ArticleExtractor(parser)
+
+    # This method crawls the CNBC search pages of the given tickers, opening them in parallel tabs of
+    # a browser session checked out from the pool. It returns a dictionary with the tickers as keys and
+    # the lists of links found as values.
+    def crawl(self, tickers, timers):
+        found = {}
+        with self.pool.session() as driver:
+            handles = open_tabs(driver, [search_url(self.data_in[ticker]) for ticker in tickers])
+            for ticker, handle in zip(tickers, handles):
+                timer = timers[ticker]
+                driver.switch_to.window(handle)
+
+                # Wait until the results are loaded.
+                with timer.phase("load"):
+                    wait_for_results(driver, self.timeout)
+
+                # Scroll (at most 20 times) over the page to get the news, until no more results are loaded.
+                with timer.phase("scroll"):
+                    scroll_to_end(driver, max_scrolls=20)
+
+                # Get the links of the news (except videos), skipping consecutive repeated links.
+                with timer.phase("extract"):
+                    links = []
+                    added = ""
+                    for n in extract_result_links(driver, exclude=["/video/"]):
+                        if n["href"] != added:
+                            links.append(n["href"])
+                            added = n["href"]
+                found[ticker] = links
+            close_tabs(driver, handles)
+        return found
     
     # This method scrapes the CNBC webpage, retrieving articles' links and headlines.
+    # It returns a dictionary with the tickers as keys and the lists of (date, article) pairs written
+    # in this run as values.
     def Scrape(self):
         # Scraping the CNBC page to retrieve news for each ticker received as input in the constructor.
-        for ticker in self.data_in.keys():
-
-            '''
-            # If using Firefox as your webdriver, please use the following:
-
-            firefox_options = webdriver.FirefoxOptions()
-            firefox_options.headless = True
-            driver = webdriver.Firefox(executable_path='geckodriver.exe', options=firefox_options)
-
-            # And please comment lines 46-48.
-            '''
-
-            driver = webdriver.Edge(EdgeChromiumDriverManager().install()) # Use selenium webdriver in Microsoft Edge to scrape the web.
-            options = EdgeOptions()
-            options.use_chromium = True
-            url = "https://www.cnbc.com/search/?query=" + self.data_in[ticker] +"&qsearchterm=" + self.data_in[ticker] # Build the URL.
-            driver.get(url) # Get the elements of the webpage.
-            time.sleep(5) # Sleep for 5 seconds.
-            SCROLL_PAUSE_TIME = 2 # Time (in seconds) to pause in between scrolls.
-
-            # Get scroll height.
-            last_height = driver.execute_script("return document.body.scrollHeight")
-            count = 0
-
-            # Scroll 20 times over the page to get the news.
-            while count < 20:
-                count += 1
-                # Scroll down to bottom.
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-
-                # Wait to load page.
-                time.sleep(SCROLL_PAUSE_TIME)
-
-                # Calculate new scroll height and compare with last scroll height.
-                new_height = driver.execute_script("return document.body.scrollHeight")
-
-                # If the end has been reached, break out of the loop.
-                if new_height == last_height:
-                    break
-                last_height = new_height
-
-            # Find the elements which contains the news blocks.
-            container = driver.find_element_by_id("searchcontainer")
-            news = container.find_elements_by_css_selector("*") # Get all the news.
-            links = []
-            added = ""
-
-            # Iterate over the news found in the webpage and add the links found to a list.
-            for n in news:
-                if n.get_attribute("class") == "resultlink":
-                    if n.get_attribute("href") != added and ("/video/" not in n.get_attribute("href")):
-                        links.append(n.get_attribute("href"))
-                        added = n.get_attribute("href")
-
-            # Write the links to a text file.
-            f = open("./links//" + ticker + ".txt", "w+", encoding="utf-8")
+        # The tickers are split in batches that are crawled at the same time, one browser session each.
+        timers = {ticker: PhaseTimer("Scraping " + ticker) for ticker in self.data_in.keys()}
+        tickers = list(self.data_in.keys())
+        batches = [tickers[i:i + self.tabs] for i in range(0, len(tickers), self.tabs)]
+        found = {}
+        with ThreadPoolExecutor(max_workers=self.pool.size) as executor:
+            for result in executor.map(lambda batch: self.crawl(batch, timers), batches):
+                found.update(result)
+        if self.own_pool:
+            self.pool.close()
+
+        for ticker in tickers:
+            links = found[ticker]
+
+            # Write the links to a text file. In incremental mode, only the links that are not in the file yet are appended.
+            links_path = "./links//" + ticker + ".txt"
+            if self.incremental and path.exists(links_path):
+                with open(links_path, "r", encoding="utf-8") as f:
+                    known = set(l.strip() for l in f)
+                links = [l for l in links if l not in known]
+                f = open(links_path, "a", encoding="utf-8")
+            else:
+                f = open(links_path, "w+", encoding="utf-8")
             for l in links:
                 f.write(l + "\n")
-            driver.close() # Close driver file.
-        f.close() # Close articles' file.
+            f.close() # Close links' file.
 
         # For each ticker, get the link associated with each of the news and scrape the article webpage
         #  so that the whole body of the article can be scraped and stored in a text file.
+        new_records = {}
         for ticker in self.data_in.keys():
-            w = open("./articles//" + ticker + "-db.txt", "w+", encoding="utf-8") # Open file to write the articles at.
+            new_records[ticker] = []
+            index = LinkIndex(ticker) if self.incremental else None
+            mode = "a" if self.incremental else "w+"
+            w = open("./articles//" + ticker + "-db.txt", mode, encoding="utf-8") # Open file to write the articles at.
             f = open("./links//" + ticker + ".txt", "r", encoding="utf-8") # Open the file containing the links.
             lines = f.readlines()
+
+            # In incremental mode, skip the links that were already scraped.
+            if index is not None:
+                lines = [l for l in lines if not index.seen(l.split(",")[0])]
+
+            # Get the date and the URL of each article, skipping the links without a date.
+            dates, urls = [], []
             for l in lines:
-                try:
-                    date = re.findall("[0-9]{1,}/[0-9]{1,}/[0-9]{1,}", l)[0] # Get the date of the article.
-                    page = requests.get(l.split(",")[0]) # Get the whole page.
-                    soup = BeautifulSoup(page.text, 'html.parser') # Parse the page as a soup object.
-                    article = soup.find_all("div", {"class": "ArticleBody-articleBody"})  # Find the body of the article.
-                    
+                date = re.findall("[0-9]{1,}/[0-9]{1,}/[0-9]{1,}", l)
+                if date:
+                    dates.append(date[0])
+                    urls.append(l.split(",")[0].strip())
+
+            # Download all the articles concurrently, keeping the order of the links.
+            with timers[ticker].phase("fetch"):
+                pages = self.fetcher.fetch_all(urls)
+            for date, (url, page) in zip(dates, pages):
+                if page is None:
+                    continue
+                # Parse the page and find the body of the article.
+                text = self.extractor.body(self.extractor.parse(page))
+                if text is None:
+                    # Remember pages without an article body so that they are not downloaded again.
+                    if index is not None:
+                        index.add(url, date, None)
+                    continue
+
+                # Do not write an article twice, even if it was found under a different link.
+                if index is not None:
+                    duplicate = index.known(text)
+                    index.add(url, date, text)
+                    if duplicate:
+                        continue
+
                 # Write the article to the text file.
-                    text = article[0].get_text()
-                    w.write(date + ", " + text)
-                    w.write("\n\n")
-                except: pass
+                w.write(date + ", " + text)
+                w.write("\n\n")
+                new_records[ticker].append((date, text))
             
-            # Close the files.
+            # Close the files and save the index.
             f.close()
             w.close()
+            if index is not None:
+                index.save()
+            timers[ticker].report()
+
+        self.cache.save()
+        self.cache.report()
+        return new_records
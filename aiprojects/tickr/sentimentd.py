@@ -0,0 +1,130 @@
+#----------------------------------------------------------------------------------#
+# This file contains a sentiment worker service: a long-lived process that loads the
+# VADER model once and scores batches of texts sent to it over a Unix socket, so the
+# analyses do not pay for loading NLTK and the lexicon every time they run. It also
+# contains the SentimentClient class used by the Analyzer to talk to the service.
+# The service is started from the command line, i.e.:
+#
+#      python sentimentd.py ./sentimentd.sock
+#
+# Authors: Allen Westgate, Bernardo Santos, and Ryan Farrell.
+#----------------------------------------------------------------------------------#
+
+# Import all libraries.
+from socketserver import StreamRequestHandler, ThreadingMixIn, UnixStreamServer
+from os import path
+import os
+import sys
+import json
+import signal
+import socket
+import threading
+
+# Default path of the socket of the service.
+SOCKET_PATH = "./sentimentd.sock"
+
+# This is the SentimentHandler class. It reads the requests of a client, one JSON object per line, and writes one
+# JSON object per line in response: {"op": "version"} returns the version of the model, and {"texts": [...]}
+# returns the compound score of each text in {"scores": [...]}.
+class SentimentHandler(StreamRequestHandler):
+
+    # This method answers the requests of a client until it closes the connection.
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if request.get("op") == "version":
+                    response = {"version": self.server.version}
+                else:
+                    with self.server.lock:
+                        response = {"scores": self.server.scorer.compound_scores(request["texts"]).tolist()}
+            except (ValueError, KeyError, TypeError) as e:
+                response = {"error": str(e)}
+            self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+# This is the SentimentServer class. It receives the path of its socket as input, and keeps the sentiment model
+# loaded while it runs. Each client is served in its own thread, and the batches are scored one at a time.
+class SentimentServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+    # Constructor method of the SentimentServer class.
+    def __init__(self, socket_path=SOCKET_PATH):
+        import resources
+        from vader import BatchSentimentScorer, model_version
+        sia = resources.sentiment_analyzer()
+        self.scorer = BatchSentimentScorer(sia)
+        self.version = model_version(sia)
+        self.lock = threading.Lock()
+
+        # Remove the socket left by a service that did not stop cleanly.
+        if path.exists(socket_path) and not SentimentClient.available(socket_path):
+            os.remove(socket_path)
+        UnixStreamServer.__init__(self, socket_path, SentimentHandler)
+
+    # This method stops the service and removes its socket.
+    def server_close(self):
+        UnixStreamServer.server_close(self)
+        if path.exists(self.server_address):
+            os.remove(self.server_address)
+
+# This is the SentimentClient class. It receives the path of the socket of a running service as input, and sends
+# it the texts to score in batches of batch_size texts.
+class SentimentClient:
+
+    # Constructor method of the SentimentClient class.
+    def __init__(self, socket_path=SOCKET_PATH, batch_size=20000):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(socket_path)
+        self.file = self.socket.makefile("rwb")
+        self.batch_size = batch_size
+
+    # This method returns True if a service is listening on the given socket.
+    @staticmethod
+    def available(socket_path=SOCKET_PATH):
+        try:
+            SentimentClient(socket_path).close()
+            return True
+        except OSError:
+            return False
+
+    # This method sends a request to the service and returns its response.
+    def request(self, request):
+        self.file.write((json.dumps(request) + "\n").encode("utf-8"))
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("The sentiment service closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            raise ValueError("The sentiment service failed: " + response["error"])
+        return response
+
+    # This method returns the version of the sentiment model of the service (see the vader.model_version method).
+    def version(self):
+        return self.request({"op": "version"})["version"]
+
+    # This method returns the list of compound scores of the given texts.
+    def compound_scores(self, texts):
+        scores = []
+        for i in range(0, len(texts), self.batch_size):
+            scores.extend(self.request({"texts": texts[i:i + self.batch_size]})["scores"])
+        return scores
+
+    # This method closes the connection to the service.
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+if __name__ == "__main__":
+    server = SentimentServer(sys.argv[1] if len(sys.argv) > 1 else SOCKET_PATH)
+    print("Sentiment service listening on", server.server_address)
+
+    # Stop cleanly (and remove the socket) when the service is terminated.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,150 @@
+#----------------------------------------------------------------------------------#
+# This file contains the Timeline class, which keeps the positive, negative and
+# neutral counts and the mean compound score of the tweets or articles of a ticker
+# for each day. The days are kept in arrays, so the texts are added in a single
+# pass, and the counts of the last N days (i.e.: the last 1, 7 or 30 days) are
+# taken from running totals in constant time.
+#
+# Authors: Allen Westgate, Bernardo Santos, and Ryan Farrell.
+#----------------------------------------------------------------------------------#
+
+# Import all libraries.
+from os import path
+import json
+import re
+import numpy as np
+
+# Date at the start of a tweet line (i.e.: "2021-05-10") or of an article (i.e.: "2021/05/07,").
+DAY = re.compile(r"(\d{4})[-/](\d\d)[-/](\d\d)")
+
+# Columns of the counts.
+LABELS = ["positive", "negative", "neutral"]
+
+# This method returns the day (as "YYYY-MM-DD") at the start of a tweet line or an article, or None if it does
+# not start with a date (i.e.: the second line of a tweet with several lines).
+def text_day(text):
+    m = DAY.match(text)
+    return "-".join(m.groups()) if m else None
+
+# This is the Timeline class. It receives the version of the analysis that fills it (see the
+# Analyzer.analyze_cnbc_and_twitter method) and the threshold of the positive and negative scores as input.
+# The position attribute is the position of the tweets or articles file up to which the timeline was filled,
+# as kept in the state of the Analyzer.
+class Timeline:
+
+    # Constructor method of the Timeline class.
+    def __init__(self, version=None, threshold=0.1):
+        self.version = version
+        self.threshold = threshold
+        self.position = None
+        self.first = None
+        self.counts = np.zeros((0, 3), dtype=np.int64)
+        self.sums = np.zeros(0, dtype=np.float64)
+        self.totals = None
+
+    # This method returns the path of the timeline of a ticker, for its "tweets" or "cnbc" texts.
+    @staticmethod
+    def file_path(ticker, source):
+        return "./sentiments/" + ticker + "-timeline-" + source + ".npz"
+
+    # This method returns the saved timeline of a ticker, or an empty one if there is none or if it was made
+    # by another version of the analysis.
+    @staticmethod
+    def load(ticker, source, version=None, threshold=0.1):
+        timeline = Timeline(version, threshold)
+        if path.exists(Timeline.file_path(ticker, source)):
+            with np.load(Timeline.file_path(ticker, source)) as data:
+                if version is None or str(data["version"]) == version:
+                    timeline.version = str(data["version"])
+                    timeline.position = json.loads(str(data["position"]))
+                    timeline.first = data["first"][()] if data["counts"].size else None
+                    timeline.counts = data["counts"]
+                    timeline.sums = data["sums"]
+        return timeline
+
+    # This method saves the timeline of a ticker.
+    def save(self, ticker, source):
+        first = self.first if self.first is not None else np.datetime64("NaT", "D")
+        np.savez(Timeline.file_path(ticker, source), version=str(self.version), position=json.dumps(self.position),
+                 first=first, counts=self.counts, sums=self.sums)
+
+    # This method returns the number of days of the timeline, from the first to the last day with a text.
+    def __len__(self):
+        return len(self.sums)
+
+    # This method adds the compound scores of texts from the given days (as "YYYY-MM-DD", or None for the texts
+    # without a date, which are left out), each counted weight times (once if no weights are given).
+    def add(self, days, scores, weights=None):
+        known = np.array([day is not None for day in days], dtype=bool)
+        if not known.any():
+            return
+        dates = np.array([day for day in days if day is not None], dtype="datetime64[D]")
+        scores = np.asarray(scores, dtype=np.float64)[known]
+        weights = np.ones(len(scores), dtype=np.int64) if weights is None else np.asarray(weights, dtype=np.int64)[known]
+
+        # Extend the arrays to the days of the new texts.
+        first = dates.min() if self.first is None else min(self.first, dates.min())
+        last = dates.max() if self.first is None else max(self.first + len(self) - 1, dates.max())
+        size = int((last - first).astype(np.int64)) + 1
+        if self.first is None or first != self.first or size != len(self):
+            before = 0 if self.first is None else int((self.first - first).astype(np.int64))
+            counts = np.zeros((size, 3), dtype=np.int64)
+            sums = np.zeros(size, dtype=np.float64)
+            counts[before:before + len(self)] = self.counts
+            sums[before:before + len(self)] = self.sums
+            self.first, self.counts, self.sums = first, counts, sums
+
+        # Same classes as the Analyzer: positive from threshold, negative up to -threshold, neutral in between.
+        index = (dates - self.first).astype(np.int64)
+        label = np.where(scores >= self.threshold, 0, np.where(scores > -self.threshold, 2, 1))
+        self.counts += np.bincount(index * 3 + label, weights=weights, minlength=size * 3).astype(np.int64).reshape(size, 3)
+        self.sums += np.bincount(index, weights=scores * weights, minlength=size)
+        self.totals = None
+
+    # This method returns the running totals of the counts and of the scores (with a first row of zeros), so that
+    # the totals of any range of days are the difference of two rows. They are computed again after an add.
+    def running_totals(self):
+        if self.totals is None:
+            counts = np.zeros((len(self) + 1, 3), dtype=np.int64)
+            sums = np.zeros(len(self) + 1, dtype=np.float64)
+            np.cumsum(self.counts, axis=0, out=counts[1:])
+            np.cumsum(self.sums, out=sums[1:])
+            self.totals = (counts, sums)
+        return self.totals
+
+    # This method returns the counts and the mean compound score (None if there is no text) of the given number
+    # of days up to end (as "YYYY-MM-DD", the last day of the timeline if not given), i.e.: window(7) for the
+    # last week, as {"positive", "negative", "neutral", "mean"}.
+    def window(self, days, end=None):
+        r = {"positive": 0, "negative": 0, "neutral": 0, "mean": None}
+        if self.first is None:
+            return r
+        stop = len(self) if end is None else int((np.datetime64(end, "D") - self.first).astype(np.int64)) + 1
+        stop = min(stop, len(self))
+        start = max(stop - days, 0)
+        if stop <= start:
+            return r
+        counts, sums = self.running_totals()
+        window_counts = counts[stop] - counts[start]
+        for label, count in zip(LABELS, window_counts.tolist()):
+            r[label] = count
+        total = int(window_counts.sum())
+        r["mean"] = float(sums[stop] - sums[start]) / total if total else None
+        return r
+
+    # This method returns the counts and the mean compound score of every day of the timeline over the given
+    # number of days up to it (i.e.: rolling(7) for a weekly average), as a list of dates and a dictionary of
+    # arrays with the "positive", "negative", "neutral" and "mean" values (the mean is NaN without texts).
+    def rolling(self, days=1):
+        if self.first is None:
+            return [], {label: np.zeros(0) for label in LABELS + ["mean"]}
+        counts, sums = self.running_totals()
+        stop = np.arange(1, len(self) + 1)
+        start = np.maximum(stop - days, 0)
+        window_counts = counts[stop] - counts[start]
+        total = window_counts.sum(axis=1)
+        r = {label: window_counts[:, i] for i, label in enumerate(LABELS)}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r["mean"] = np.where(total > 0, (sums[stop] - sums[start]) / total, np.nan)
+        dates = np.arange(self.first, self.first + len(self)).astype(str).tolist()
+        return dates, r
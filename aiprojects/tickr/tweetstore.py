@@ -0,0 +1,170 @@
+#----------------------------------------------------------------------------------#
+# This file contains the TweetStore class, which stores the tweets of a ticker in a
+# compact binary file without duplicates, together with an index by date, so that
+# the tweets of a range of dates can be read without going through the whole file.
+# It can also be run to convert the existing tweets text files, i.e.:
+#
+#      python tweetstore.py JPM GS MSFT AMZN AAPL BTC
+#
+# Authors: Allen Westgate, Bernardo Santos, and Ryan Farrell.
+#----------------------------------------------------------------------------------#
+
+# Import all libraries.
+from os import path
+import datetime
+import hashlib
+import os
+import re
+import struct
+import sys
+import numpy as np
+
+# Each tweet is stored as a header (id, date as a day number, length of the text in bytes) followed by its
+# text encoded in UTF-8. Each entry of the index holds the date, id and position of a tweet in the data file.
+RECORD = struct.Struct("<QiI")
+INDEX_DTYPE = np.dtype([("date", "<i4"), ("id", "<u8"), ("offset", "<u8")])
+
+# Tweets converted from the text files have no id, so they get one made from a hash of their line.
+# The highest bit is set so that these ids never collide with the ids given by Twitter.
+SYNTHETIC_ID = 1 << 63
+
+# This method returns the day number stored for a date given as "YYYY-MM-DD".
+def day_number(date):
+    return datetime.date.fromisoformat(date).toordinal()
+
+# This method returns the id given to a tweet converted from a line of the text files.
+def synthetic_id(line):
+    return int.from_bytes(hashlib.blake2b(line.encode("utf-8"), digest_size=8).digest(), "little") | SYNTHETIC_ID
+
+# This is the TweetStore class. It receives the ticker whose tweets are stored as input
+# (i.e.: "AAPL" for ./tweets/AAPL.tws and its index ./tweets/AAPL.twi).
+class TweetStore:
+
+    # Constructor method of the TweetStore class.
+    def __init__(self, ticker, folder="./tweets"):
+        self.ticker = ticker
+        self.data_path = folder + "/" + ticker + ".tws"
+        self.index_path = folder + "/" + ticker + ".twi"
+        self.load()
+
+    # This method returns True if the store of the given ticker has been created.
+    @staticmethod
+    def exists(ticker, folder="./tweets"):
+        return path.exists(folder + "/" + ticker + ".twi")
+
+    # This method loads the index, sorted by date and then by position in the data file.
+    # Entries of tweets that do not fit in the data file (i.e.: if a run was interrupted) are ignored.
+    def load(self):
+        index = np.fromfile(self.index_path, dtype=INDEX_DTYPE) if path.exists(self.index_path) else np.empty(0, INDEX_DTYPE)
+        size = self.size()
+        complete = index["offset"] + RECORD.size <= size
+
+        # Only the last tweets of the data file can be cut, so they are checked from the end until one is complete.
+        end = 0
+        if complete.any():
+            with open(self.data_path, "rb") as data:
+                for i in np.argsort(index["offset"])[::-1]:
+                    if not complete[i]:
+                        continue
+                    data.seek(int(index["offset"][i]))
+                    length = RECORD.unpack(data.read(RECORD.size))[2]
+                    if int(index["offset"][i]) + RECORD.size + length <= size:
+                        end = int(index["offset"][i]) + RECORD.size + length
+                        break
+                    complete[i] = False
+
+        # The cut tweets are removed from both files, so that the tweets added later are not mistaken for them.
+        if not complete.all():
+            index = index[complete]
+            with open(self.data_path, "r+b") as data:
+                data.truncate(end)
+            temporary = self.index_path + ".tmp"
+            index.tofile(temporary)
+            os.replace(temporary, self.index_path)
+        self.index = index[np.lexsort((index["offset"], index["date"]))]
+        self.ids = set(self.index["id"].tolist())
+
+    # This method removes all the tweets stored.
+    def clear(self):
+        for file_path in [self.index_path, self.data_path]:
+            if path.exists(file_path):
+                os.remove(file_path)
+        self.load()
+
+    # This method returns the number of tweets stored.
+    def __len__(self):
+        return len(self.index)
+
+    # This method returns the size (in bytes) of the data file. Tweets added later are stored after this position.
+    def size(self):
+        return path.getsize(self.data_path) if path.exists(self.data_path) else 0
+
+    # This method adds tweets to the store, given as (id, date as "YYYY-MM-DD", text) tuples.
+    # Tweets whose id is already stored are skipped. It returns the number of tweets added.
+    def append(self, tweets):
+        entries = []
+        with open(self.data_path, "ab") as data:
+            offset = data.tell()
+            for tweet_id, date, text in tweets:
+                if tweet_id in self.ids:
+                    continue
+                self.ids.add(tweet_id)
+                day = day_number(date)
+                encoded = text.encode("utf-8")
+                data.write(RECORD.pack(tweet_id, day, len(encoded)))
+                data.write(encoded)
+                entries.append((day, tweet_id, offset))
+                offset += RECORD.size + len(encoded)
+
+        # The index is only written once the tweets are in the data file.
+        if entries:
+            new = np.array(entries, dtype=INDEX_DTYPE)
+            with open(self.index_path, "ab") as index:
+                new.tofile(index)
+            merged = np.concatenate([self.index, new])
+            self.index = merged[np.lexsort((merged["offset"], merged["date"]))]
+        return len(entries)
+
+    # This method yields the stored tweets as (id, date as "YYYY-MM-DD", text) tuples, ordered by date.
+    # If start and/or end are given (as "YYYY-MM-DD"), only the tweets from those dates (inclusive) are read.
+    # If offset is given (see the size method), only the tweets added after that position are read.
+    def read(self, start=None, end=None, offset=0):
+        first = np.searchsorted(self.index["date"], day_number(start), "left") if start else 0
+        last = np.searchsorted(self.index["date"], day_number(end), "right") if end else len(self.index)
+        entries = self.index[first:last]
+        if offset:
+            entries = entries[entries["offset"] >= offset]
+        if len(entries) == 0:
+            return
+        with open(self.data_path, "rb") as data:
+            for entry in entries:
+                data.seek(int(entry["offset"]))
+                tweet_id, day, length = RECORD.unpack(data.read(RECORD.size))
+                yield tweet_id, datetime.date.fromordinal(day).isoformat(), data.read(length).decode("utf-8")
+
+    # This method yields the stored tweets in the same format as the lines of the tweets text files
+    # (i.e.: "2021-05-10 Apple earnings beat expectations"), with the same filters as the read method.
+    def lines(self, start=None, end=None, offset=0):
+        for _, date, text in self.read(start, end, offset):
+            yield date + " " + text
+
+    # This method adds the tweets of a text file written by the TwitterAPI class to the store (by default,
+    # ./tweets/<ticker>-tweets.txt). Lines that do not start with a date continue the text of the previous tweet.
+    # It returns the number of tweets added.
+    def convert(self, text_path=None):
+        text_path = text_path or "./tweets/" + self.ticker + "-tweets.txt"
+        tweets = []
+        with open(text_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if re.match(r"[0-9]{4}-[0-9]{2}-[0-9]{2} ", line):
+                    tweets.append(line)
+                elif tweets:
+                    tweets[-1] += " " + line
+        return self.append((synthetic_id(t), t[:10], t[11:]) for t in tweets)
+
+if __name__ == "__main__":
+    for ticker in sys.argv[1:]:
+        store = TweetStore(ticker)
+        added = store.convert()
+        print(ticker, ":", added, "tweets added,", len(store), "tweets stored")
@@ -7,16 +7,131 @@
 # Import all libraries.
 import tweepy
 import pandas as pd
+from tweetstore import TweetStore
+from os import path
+import json
 import time
 import re
 
+# This method returns the path of the file where the retrieval progress of a ticker is saved.
+def checkpoint_path(ticker):
+    return "./tweets/" + ticker + "-checkpoint.json"
+
+# This method loads the retrieval progress of a ticker. It has the following items:
+#   max_id: id of the oldest tweet retrieved by a run that has not finished yet (None if the last run finished).
+#   since_id: id of the newest tweet retrieved by the finished runs (None if there were none).
+#   newest: id of the newest tweet retrieved by the run that has not finished yet.
+#   count: number of tweets retrieved by the run that has not finished yet.
+def load_checkpoint(ticker):
+    if not path.exists(checkpoint_path(ticker)):
+        return {"max_id": None, "since_id": None, "newest": None, "count": 0}
+    with open(checkpoint_path(ticker), "r") as f:
+        return json.load(f)
+
+# This method saves the retrieval progress of a ticker.
+def save_checkpoint(ticker, checkpoint):
+    with open(checkpoint_path(ticker), "w+") as f:
+        json.dump(checkpoint, f)
+
+# This method returns the line stored in the tweets file for a tweet: the date it was created followed by its
+# text, without links and line breaks (i.e.: "2021-05-10 Apple earnings beat expectations").
+def format_tweet(created_at, full_text):
+    text = re.sub(r'https://t.*', '', full_text, flags=re.MULTILINE)
+    text = re.sub(r'\n', '', text, flags=re.MULTILINE)
+    return (str(created_at).split(" ")[0]) + " " + str(text)
+
+# This method retrieves at most count tweets of a ticker page by page, writing each page to the tweets file and
+# the tweet store of the ticker and saving a checkpoint after it (see the TwitterAPI.Connect method). The search parameter is a
+# function that receives the since_id and max_id of the request (None and -1 when not used) and returns a page of
+# tweets, newest first, each with the id, created_at and full_text attributes. Failed requests are retried at most
+# retries times. It returns the number of tweets retrieved.
+def collect_tweets(ticker, count, search, retries=5):
+    checkpoint = load_checkpoint(ticker)
+    sinceId = checkpoint["since_id"]
+
+    # Continue the previous run if it did not finish, otherwise start a new one that stops at the newest tweet
+    # retrieved so far. Without a checkpoint, the tweets file is started from scratch. A run that stops at the
+    # newest tweet retrieved so far may take several calls to get there, so count only limits each call then.
+    if checkpoint["max_id"] is not None:
+        print("Resuming tweets retrieval for", ticker)
+        max_id, newest, curr = checkpoint["max_id"], checkpoint["newest"], checkpoint["count"]
+        if sinceId is not None:
+            curr = 0
+    else:
+        max_id, newest, curr = -1, None, 0
+    mode = "a" if path.exists(checkpoint_path(ticker)) else "w+"
+    failures = 0
+    retrieved = 0
+    exhausted = False
+
+    # The tweet store is started from scratch together with the tweets file, so that it holds the same tweets.
+    f = open("./tweets/" + ticker + "-tweets.txt", mode, encoding="utf-8")
+    store = TweetStore(ticker)
+    if mode == "w+":
+        store.clear()
+
+    # Retrieve data as much as possible before hitting the rate limit.
+    while curr < count:
+        try:
+            tweets = search(sinceId, max_id)
+
+        # If there is any exception, wait and try again a few times before giving up.
+        # The checkpoint is kept, so the next run continues from this point.
+        except Exception as e:
+            failures += 1
+            print('Failed while retrieving tweets...', str(e))
+            if failures > retries:
+                print("Giving up on", ticker, "for now, the next run will resume from here.")
+                f.close()
+                return retrieved
+            time.sleep(3 * 2 ** (failures - 1))
+            continue
+        failures = 0
+
+        # If there are no more tweets available, break out of the loop.
+        if (not tweets):
+            print("No more tweets!")
+            exhausted = True
+            break
+
+        # Write the page of tweets to the file and the store, and save the checkpoint.
+        page = []
+        for tweet in tweets:
+            line = format_tweet(tweet.created_at, tweet.full_text)
+            f.write(line)
+            f.write("\n")
+            page.append((tweet.id, line[:10], line[11:]))
+        f.flush()
+        store.append(page)
+        curr += len(tweets)
+        retrieved += len(tweets)
+        max_id = tweets[-1].id
+        newest = max(newest or 0, tweets[0].id)
+        save_checkpoint(ticker, {"max_id": max_id, "since_id": sinceId, "newest": newest, "count": curr})
+        print(ticker, "tweets retrieved so far: ", curr)
+
+    f.close()
+
+    # A run that stops at the newest tweet retrieved so far is not finished until it gets there, otherwise the
+    # tweets between that one and the oldest tweet of this run would never be retrieved. Keep the checkpoint so
+    # the next run continues from here.
+    if sinceId is not None and not exhausted:
+        print("Stopped before reaching the last retrieved tweet of", ticker + ", the next run will resume from here.")
+        return retrieved
+
+    # The run is finished, so the next one only retrieves tweets newer than the newest one retrieved so far.
+    save_checkpoint(ticker, {"max_id": None, "since_id": max(newest or 0, sinceId or 0) or None, "newest": None, "count": 0})
+    return retrieved
+
 # This class handles Twitter API calls, retrieving tweets containing the specified keywords.
 # It only receives input in the Connect method, where the tickers used to search are passed
 # (i.e.: ["Bitcoin", "BTC"]).
 class TwitterAPI:
 
     # This is the constructor class, where the connection to the API is established.
-    def __init__(self):
+    # It receives the number of times a failed request is retried before giving up as input.
+    def __init__(self, retries=5):
+        self.retries = retries
         self.consumer_key = "<key>"
         self.consumer_secret = "<key>"
         self.access_token = "<key>"
@@ -26,63 +141,28 @@ class TwitterAPI:
         self.api = tweepy.API(self.auth, wait_on_rate_limit=True, wait_on_rate_limit_notify=True)
 
     # This method sends queries to the Twitter API in order to retrieve the tweets containing the 
-    # keywords that we are looking for.
-    def Connect(self, tickers):
+    # keywords that we are looking for. The tweets are written to the file of each ticker page by page,
+    # and a checkpoint is saved after every page, so that a run that stops (i.e.: because of a crash or the
+    # rate limit) continues where it stopped the next time, and a finished run only retrieves newer tweets
+    # the next time. At most count tweets are retrieved per ticker in each run.
+    def Connect(self, tickers, count=12000):
 
         # Iterate over the tickers (i.e.: ["JPM", "GS", "MSFT"...])
         for ticker in tickers.keys():
             query = "('$" + ticker + " OR " + tickers[ticker] + "') -filter:retweets"
-            language = "en"
-            count = 12000
-            curr = 0
-            max_id = -1
-            sinceId = None
-            tweets_list = []
-
-            # Retrieve data as much as possible before hitting the rate limit.
-            # If the rate limit is reached, it will output a warning saying that it was reached.
-            while curr < count:
-
-                # When it retrieves a bunch of tweets, make sure the following tweets will not be duplicates
-                # by using the max_id parameter.
-                try:
-                    if max_id <= 0:
-                        if (not sinceId):
-                            tweets = self.api.search(q=query, count=1000, lang=language, tweet_mode="extended")
-                        else:
-                            tweets = self.api.search(q=query, count=1000, lang=language,
-                                                tweet_mode="extended", since_id=sinceId)
-                    else:
-                        if (not sinceId):
-                            tweets = self.api.search(q=query, count=1000, lang=language,
-                                                tweet_mode="extended", max_id=str(max_id-1))
-                        else:
-                            tweets = self.api.search(q=query, count=1000, lang=language,
-                                                tweet_mode="extended", 
-                                                since_id=sinceId,
-                                                max_id=str(max_id-1))
-                    
-                    # If there are no more tweets available, break out of the loop.
-                    if (not tweets):
-                        print("No more tweets!")
-                        break
-
-                    # Add tweets to a list.
-                    tweets_list += [[tweet.created_at, tweet.user.screen_name, tweet.full_text.encode('utf-8')] for tweet in tweets]
-                    curr = len(tweets_list)
-                    max_id = tweets[-1].id
-                    print("Tweets retrieved so far: ", curr)
-        
-                # If there is any exception, break out.
-                except BaseException as e:
-                    print('Failed while retrieving tweets...', str(e))
-                    time.sleep(3)
-            
-            # Write tweets to files.
-            f = open("./tweets/" + ticker + "-tweets.txt", "w+", encoding="utf-8")
-            for t in tweets_list:
-                text = re.sub(r'https://t.*', '', t[2].decode("utf-8"), flags=re.MULTILINE)
-                text = re.sub(r'\n', '', text, flags=re.MULTILINE)
-                f.write((str(t[0]).split(" ")[0]) + " " + str(text))
-                f.write("\n")
-            f.close()
+            self.collect(ticker, query, count)
+
+    # This method retrieves the tweets of a single ticker, as described in the Connect method.
+    def collect(self, ticker, query, count):
+
+        # When it retrieves a bunch of tweets, make sure the following tweets will not be duplicates
+        # by using the max_id parameter.
+        def search(sinceId, max_id):
+            params = {"q": query, "count": 1000, "lang": "en", "tweet_mode": "extended"}
+            if sinceId:
+                params["since_id"] = sinceId
+            if max_id > 0:
+                params["max_id"] = str(max_id-1)
+            return self.api.search(**params)
+
+        return collect_tweets(ticker, count, search, self.retries)
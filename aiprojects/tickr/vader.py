@@ -0,0 +1,220 @@
+#----------------------------------------------------------------------------------#
+# This file contains the BatchSentimentScorer class, which gives the VADER compound
+# score of many texts at once. The lexicon and the booster, negation and "but"
+# rules of NLTK's SentimentIntensityAnalyzer are compiled into lookup tables, and
+# the rules are applied to the whole batch with NumPy arrays instead of word by word.
+#
+# Authors: Allen Westgate, Bernardo Santos, and Ryan Farrell.
+#----------------------------------------------------------------------------------#
+
+# Import all libraries.
+import hashlib
+import re
+import string
+import numpy as np
+import resources
+
+# Characters removed from the words by VADER, and the punctuation it strips from the start or end of a word.
+PUNCTUATION = string.punctuation
+REMOVE_PUNCTUATION = re.compile("[" + re.escape(string.punctuation) + "]")
+
+# Properties of the words used by the rules (see the BatchSentimentScorer.properties method), and the number of
+# words whose properties are kept between batches.
+PROPERTIES = ["valence", "in_lexicon", "booster", "is_booster", "upper", "negated", "never",
+              "so_this", "least", "at_very", "kind", "of", "but"]
+MAX_KNOWN_WORDS = 1000000
+
+# This method returns the version of the sentiment model of the given SentimentIntensityAnalyzer: the scores
+# only change with the lexicon or the rules of NLTK, so the version is made from a hash of both.
+def model_version(sia):
+    import nltk
+    lexicon = "\n".join(word + "\t" + repr(sia.lexicon[word]) for word in sorted(sia.lexicon)) + "\n" + nltk.__version__
+    return "vader-" + hashlib.sha1(lexicon.encode("utf-8")).hexdigest()[:12]
+
+# This is the BatchSentimentScorer class. It receives the SentimentIntensityAnalyzer whose lexicon and constants
+# are used as input (a new one is created if none is given). Texts are scored in batches of batch_size texts.
+class BatchSentimentScorer:
+
+    # Constructor method of the BatchSentimentScorer class.
+    def __init__(self, sia=None, batch_size=2048):
+        self.sia = sia or resources.sentiment_analyzer()
+        self.lexicon = self.sia.lexicon
+        self.constants = self.sia.constants
+        self.batch_size = batch_size
+        self.punc_list = set(self.constants.PUNC_LIST)
+        self.known = {}
+
+        # The idioms and the booster phrases are made of several words. They are rare, so the texts that
+        # may contain one are scored by the SentimentIntensityAnalyzer instead (see the compound_scores method).
+        phrases = list(self.constants.SPECIAL_CASE_IDIOMS) + [b for b in self.constants.BOOSTER_DICT if " " in b]
+        self.phrase_starts = [tuple(p.split(" ")[:2]) for p in phrases]
+
+    # This method splits a text in words like VADER does: words of a single character are dropped, and the
+    # punctuation at the start or end of a word is removed if what is left is a word of the text.
+    def tokenize(self, text):
+        words = [w for w in text.split() if len(w) > 1]
+        words_only = None
+        for i, w in enumerate(words):
+            if w[0] in PUNCTUATION or w[-1] in PUNCTUATION:
+                if words_only is None:
+                    words_only = set(REMOVE_PUNCTUATION.sub("", text).split())
+                core = w.strip(PUNCTUATION)
+                if len(core) > 1 and core in words_only:
+                    lead = len(w) - len(w.lstrip(PUNCTUATION))
+                    if (lead == 0 and w[len(core):] in self.punc_list) or (lead == len(w) - len(core) and w[:lead] in self.punc_list):
+                        words[i] = core
+        return words
+
+    # This method returns the properties of a word that the rules look at, in the order of the PROPERTIES list.
+    # They are kept for the next batches, since most words come back again and again.
+    def properties(self, word):
+        found = self.known.get(word)
+        if found is None:
+            lower = word.lower()
+            found = (
+                self.lexicon.get(lower, 0.0),
+                lower in self.lexicon,
+                self.constants.BOOSTER_DICT.get(lower, 0.0),
+                lower in self.constants.BOOSTER_DICT,
+                word.isupper(),
+                lower in self.constants.NEGATE or "n't" in lower,
+                word == "never",
+                word == "so" or word == "this",
+                lower == "least" and lower not in self.lexicon,
+                lower == "at" or lower == "very",
+                lower == "kind",
+                lower == "of",
+                lower == "but",
+            )
+            if len(self.known) >= MAX_KNOWN_WORDS:
+                self.known.clear()
+            self.known[word] = found
+        return found
+
+    # This method returns the properties of each distinct word of a batch as arrays indexed by the id of the word
+    # (i.e.: table["valence"][3] is the valence of the word with id 3). Id 0 is the padding after the last word of
+    # each text, which has no properties.
+    def word_table(self, vocab):
+        values = np.array([(0.0,) * len(PROPERTIES)] + [self.properties(w) for w in vocab], dtype=float)
+        return {name: values[:, i] if name in ("valence", "booster") else values[:, i] != 0 for i, name in enumerate(PROPERTIES)}
+
+    # This method returns the compound scores of a batch of texts, given with their words. The rules are the same
+    # as in the SentimentIntensityAnalyzer.polarity_scores method, applied to all the words of all the texts at once,
+    # except for the texts that may contain an idiom, which are scored by the SentimentIntensityAnalyzer.
+    def score_batch(self, texts, tokens):
+        c = self.constants
+        n = len(texts)
+        width = max(1, max(len(words) for words in tokens))
+
+        # Give an id to each distinct word of the batch, and write the words of each text as a row of ids.
+        vocab = {}
+        ids = np.zeros((n, width), np.int64)
+        for r, words in enumerate(tokens):
+            ids[r, :len(words)] = [vocab.setdefault(w, len(vocab) + 1) for w in words]
+        table = self.word_table(vocab)
+        col = np.arange(width)
+        real = col < np.array([len(words) for words in tokens])[:, None]
+
+        # Texts with two consecutive words that start an idiom or a booster phrase.
+        codes = [vocab[a] * (len(vocab) + 1) + vocab[b] for a, b in self.phrase_starts if a in vocab and b in vocab]
+        idioms = np.isin(ids[:, :-1] * (len(vocab) + 1) + ids[:, 1:], codes).any(1) if codes else np.zeros(n, bool)
+
+        # This method returns the property of the word that is k words before (or after, if k is negative)
+        # each word of the batch, or False/0 if there is no such word.
+        def shifted(prop, k):
+            out = np.zeros((n, width), prop.dtype)
+            if k > 0:
+                out[:, k:] = prop[ids[:, :-k]]
+            else:
+                out[:, :k] = prop[ids[:, -k:]]
+            return out
+
+        # Some but not all words are in ALL CAPS.
+        upper = table["upper"][ids] & real
+        cap_diff = (upper.sum(1) > 0) & (upper.sum(1) < real.sum(1))
+        cap_diff = cap_diff[:, None]
+
+        # Valence of the words of the lexicon, with the emphasis of ALL CAPS.
+        v = table["valence"][ids]
+        v = np.where(upper & cap_diff, np.where(v > 0, v + c.C_INCR, v - c.C_INCR), v)
+
+        # Boosters and negations among the three preceding words.
+        for start_i in range(0, 3):
+            k = start_i + 1
+            applies = (col > start_i) & ~shifted(table["in_lexicon"], k)
+            s = shifted(table["booster"], k)
+            s = np.where(v < 0, -s, s)
+            boost_caps = shifted(table["is_booster"], k) & shifted(table["upper"], k) & cap_diff
+            s = np.where(boost_caps, np.where(v > 0, s + c.C_INCR, s - c.C_INCR), s)
+            if start_i == 1:
+                s = s * 0.95
+            if start_i == 2:
+                s = s * 0.9
+            v = np.where(applies, v + s, v)
+
+            negated = applies & shifted(table["negated"], k)
+            if start_i == 0:
+                v = np.where(negated, v * c.N_SCALAR, v)
+            if start_i == 1:
+                never = applies & shifted(table["never"], 2) & shifted(table["so_this"], 1)
+                v = np.where(never, v * 1.5, np.where(negated, v * c.N_SCALAR, v))
+            if start_i == 2:
+                never = applies & ((shifted(table["never"], 3) & shifted(table["so_this"], 2)) | shifted(table["so_this"], 1))
+                v = np.where(never, v * 1.25, np.where(negated, v * c.N_SCALAR, v))
+
+        # Negation with "least" (but not "at least" or "very least").
+        least = shifted(table["least"], 1) & (col > 0) & ((col == 1) | ~shifted(table["at_very"], 2))
+        v = np.where(least, v * c.N_SCALAR, v)
+
+        # Words out of the lexicon, boosters and "kind" in "kind of" have no valence.
+        kind_of = table["kind"][ids] & shifted(table["of"], -1)
+        v = np.where(table["in_lexicon"][ids] & ~table["is_booster"][ids] & ~kind_of & real, v, 0.0)
+
+        # VADER scores each word at the position of its first occurrence in the text.
+        keys = np.arange(n)[:, None] * (len(vocab) + 1) + ids
+        _, first, inverse = np.unique(keys.ravel(), return_index=True, return_inverse=True)
+        first = first[inverse.ravel()].reshape(n, width) - np.arange(n)[:, None] * width
+        sentiments = np.where(real, np.take_along_axis(v, first, 1), 0.0)
+
+        # The words before the first "but" count half, and the words after it count one and a half times.
+        but = table["but"][ids] & real
+        bi = np.where(but.any(1), but.argmax(1), width)[:, None]
+        sentiments = np.where(col < bi, np.where(bi < width, sentiments * 0.5, sentiments), np.where(col > bi, sentiments * 1.5, sentiments))
+
+        # Add the sentiments in the same order as VADER, so that the sums are exactly the same.
+        total = np.zeros(n)
+        for i in range(width):
+            total = total + sentiments[:, i]
+
+        # Emphasis from the exclamation points and question marks, and normalization to [-1, 1].
+        amplifiers = np.array([self.punctuation_emphasis(text) for text in texts])
+        total = np.where(total > 0, total + amplifiers, np.where(total < 0, total - amplifiers, total))
+        compound = total / np.sqrt(total * total + 15)
+        compound = [round(x, 4) for x in compound.tolist()]
+        for r in np.flatnonzero(idioms):
+            compound[r] = self.sia.polarity_scores(texts[r])["compound"]
+        return np.array(compound)
+
+    # This method returns the emphasis added by the exclamation points (up to 4) and question marks of a text.
+    def punctuation_emphasis(self, text):
+        ep_amplifier = min(text.count("!"), 4) * 0.292
+        qm_count = text.count("?")
+        qm_amplifier = 0
+        if qm_count > 1:
+            qm_amplifier = qm_count * 0.18 if qm_count <= 3 else 0.96
+        return ep_amplifier + qm_amplifier
+
+    # This method returns the compound scores (between -1 and 1) of a list of texts, as a NumPy array. The scores
+    # are the same as the "compound" value of the SentimentIntensityAnalyzer.polarity_scores method.
+    def compound_scores(self, texts):
+        texts = list(texts)
+        scores = np.zeros(len(texts))
+        tokens = [self.tokenize(text) for text in texts]
+
+        # The texts are sorted by number of words, so that the texts of each batch have about the same length
+        # and little padding is needed.
+        order = sorted(range(len(texts)), key=lambda i: len(tokens[i]))
+        for start in range(0, len(order), self.batch_size):
+            rows = order[start:start + self.batch_size]
+            scores[rows] = self.score_batch([texts[i] for i in rows], [tokens[i] for i in rows])
+        return scores
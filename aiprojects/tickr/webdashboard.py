@@ -20,8 +20,9 @@ from keras.models import load_model
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.metrics import r2_score
 import numpy as np
-import pandas_datareader as web
 from bitcoin import Bitcoin
+from timeline import Timeline
+from pricestore import price_history
 pd.options.mode.chained_assignment = None
 
 # This class builds a dashboard for the user to interact with and see our 
@@ -54,7 +55,7 @@ class Dashboard:
         # that the values can be used to make our recommendations.
         for ticker in tickers:
             print("Loading model for", ticker)
-            df = web.DataReader(ticker, data_source='yahoo', start='2010-01-01', end=limit)
+            df = price_history(ticker, '2010-01-01', limit)
             df['Stock'] = ticker
 
             close_df = df.filter(['Close'])
@@ -96,7 +97,7 @@ class Dashboard:
             print(ticker, "R^2: ", r2)
             print()
 
-            quote = web.DataReader(ticker,data_source='yahoo', start='2010-01-01', end=limit)
+            quote = df
             new_df = quote.filter(['Close'])
             last_60 = new_df[-train_size:].values
             last_60_scaled = scaler.transform(last_60)
@@ -244,6 +245,7 @@ class Dashboard:
                         html.Div([
                             html.Div([scatter]),
                             html.Div([bar]),
+                            html.Div([dcc.Graph(id='timelineGraph')]),
                             html.Div([
                                 html.H4( 
                                 children='Recommendation: ',
@@ -597,4 +599,21 @@ class Dashboard:
 
             return figure, figure2, figure3, recommendation, style, sub_r
         
+        # This callback charts the sentiments of the selected ticker over time: the mean compound score of its tweets
+        # and articles over the last 7 days, for each day, read from the timelines saved by the Analyzer.
+        @app.callback(Output('timelineGraph', 'figure'),
+                    [Input('my-dropdown2', 'value')])
+        def update_timeline(selected_dropdown):
+            figure = go.Figure()
+            if selected_dropdown is not None:
+                for source, name in [("tweets", "Tweets"), ("cnbc", "Articles")]:
+                    dates, rolling = Timeline.load(selected_dropdown, source).rolling(7)
+                    if dates:
+                        figure.add_trace(go.Scatter(x=dates, y=rolling["mean"], mode='lines+markers', name=name,
+                                                    connectgaps=True))
+            figure.update_layout(title="Sentiments Over Time (7-Day Mean Compound Score)")
+            figure.update_xaxes(title='Date', type='date')
+            figure.update_yaxes(title='Compound Score', range=[-1, 1])
+            return figure
+
         app.run_server(debug=False) # Run the app.
@@ -15,11 +15,17 @@ from clustering import Cluster
 from bitcoin import Bitcoin
 from analyzer import Analyzer
 from webdashboard import Dashboard
+from browser import BrowserPool
+from httpcache import HTTPCache
 
 # This is the main class of the driver file, responsible for calling each of the files used to scrape news/tweets,
 # analyze articles/tweets, train the Machine Learning models, and predict future values.
 if __name__ == "__main__":
 
+  # Headless browser sessions and cache of downloaded pages shared by the scraper and the clustering.
+  pool = BrowserPool(size=2)
+  cache = HTTPCache()
+
   # Scrape the CNBC page for articles.
   # Tip: use the data already saved in the project folder instead of running everything again,
   # otherwise it will take a long time!!!
@@ -32,7 +38,9 @@ if __name__ == "__main__":
       "MSFT": "Microsoft",
       "AMZN": "Amazon",
       "AAPL": "Apple"
-      }
+      },
+    pool=pool,
+    cache=cache
     )
   scraper.Scrape()
   print("Scraping finished...") 
@@ -51,6 +59,11 @@ if __name__ == "__main__":
               }
   tt = TwitterAPI()
   tt.Connect(tt_tickers)
+
+  # Or, to retrieve the tweets of all the tickers at the same time, sharing the rate limit of one or more app credentials
+  # (see fakesearch.py to run it against a local server instead of Twitter):
+  # from collector import TweetCollector
+  # TweetCollector(["<bearer token>", "<bearer token>"]).Connect(tt_tickers)
   '''
 
   # Train the LSMT Model for stock predictions.
@@ -63,7 +76,13 @@ if __name__ == "__main__":
   company_names = ["jpmorgan", "goldman%20sachs", "microsoft", "amazon", "apple"]
   ticker_names=["JPM","GS", "MSFT","AMZN","AAPL"]
   ticker_dict = {"jpmorgan": "JPM", "goldman%20sachs": "GS", "microsoft": "MSFT", "amazon": "AMZN", "apple": "AAPL"}
-  cluster = Cluster(company_names, ticker_names, ticker_dict)
+  cluster = Cluster(company_names, ticker_names, ticker_dict, pool=pool, cache=cache)
+
+  # To cluster all the companies at the same time, fitting their models in a pool of processes:
+  # cluster.Driver(processes=4)
+
+  # The number of clusters of each company is 10 unless one was chosen for it (run again when there are many new articles):
+  # python kselection.py JPM GS MSFT AMZN AAPL
 
   # Analyze tweets and articles.
   print("Analzying tweets/articles...")
@@ -77,5 +96,11 @@ if __name__ == "__main__":
   analyzer = Analyzer(analysis_tickers)
   analyzer.analyze_cnbc_and_twitter()
 
+  # Or, to score the texts with a sentiment worker service that keeps the model loaded between runs
+  # (started once with "python sentimentd.py ./sentimentd.sock"):
+  # analyzer.analyze_cnbc_and_twitter(service="./sentimentd.sock")
+
+  pool.close()
+
   #Finally, display dashboard to user.
   dashboard = Dashboard("2021-05-07",['JPM', 'GS', 'MSFT', 'AMZN', 'AAPL'], 60)